@@ -11,13 +11,20 @@ st.set_page_config(
 )
 
 # 2. 导入自定义模块
-from utils import io, prep # 从 utils 包中导入 io（数据加载）和 prep（数据预处理）模块
-from sections import intro, overview, deep_dives, conclusions # 从 sections 包中导入应用的四个页面模块
+from utils import io, prep, cube, figcache, perf, export, warmup, search # 从 utils 包中导入 io（数据加载）、prep（数据预处理）、cube（聚合立方体）、figcache（图表缓存）、perf（性能计时）、export（预渲染报告）、warmup（后台预热）和 search（全文检索）模块
+from sections import registry # 页面注册表：页面模块（及其依赖的 Plotly）在首次显示该页面时才导入
 
 # 3. 常量定义：数据文件和 Logo 图片的文件名
 DATA_PATH = 'Ntitles.csv' # 定义数据文件的路径
 LOGO_2 = '微信图片_20251121083856_35_777.png' # 第一个 Logo 图片的文件名
 LOGO_1 = 'retouch_2025112400100760.png' # 第二个 Logo 图片的文件名
+WORKERS = None # 设为进程数（如 4）时在进程池中并行清洗大目录；低于 prep.PARALLEL_MIN_ROWS 行时仍为串行
+CHUNKSIZE = None # 设为行数（如 200_000）时按块流式加载 CSV，不在内存中保留 cast/description 全文，适合超大目录
+DEBUG_PANEL = False # 为 True（或 URL 带 ?debug=1）时在侧边栏显示本次重新运行的各阶段耗时
+EXPORT_DIR = 'exports' # `python -m utils.export` 生成的预渲染图表目录；筛选条件与某个预设一致时直接使用其中的图表
+METRICS_FILE = None # 设为文件路径时，每次重新运行的计时以 JSON 行追加写入，便于跨会话汇总
+WARMUP = False # 为 True 时首个会话在后台预热数据和默认图表；`python serve.py` 总会在服务启动时预热，无需开启
+READY_FILE = None # 设为文件路径时，后台预热完成后创建该文件，可作为就绪探针（如 `test -f <文件>`）
 
 def main():
     # --- 侧边栏用户界面 (Sidebar UI) ---
@@ -58,34 +65,52 @@ def main():
     # 导航部分 (Navigation)
     page = st.sidebar.radio( # 创建单选按钮组，用于页面导航
         "Navigate", # 导航的标签名称
-        ["Introduction", "Macro Overview", "Deep Dive Analysis", "Conclusions"], # 导航选项列表
+        list(registry.PAGES), # 导航选项列表（Introduction, Macro Overview, Deep Dive Analysis, Conclusions）
         index=0 # 默认选中第一个选项（Introduction）
     )
+    perf.start_run(page=page) # 开始记录本次重新运行的各阶段耗时
+    section = registry.load(page) # 按需导入当前页面的模块；首次导入的耗时记录为 import:<模块> 计时
+
+    # 后台预热：默认关闭，由 `python serve.py` 在服务启动时开始；WARMUP 为 True 时每个进程只启动一次。未完成时本会话照常加载
+    if WARMUP:
+        warmup.start(DATA_PATH, export_dir=EXPORT_DIR, ready_file=READY_FILE, chunksize=CHUNKSIZE, workers=WORKERS)
+    if warmup.status()['state'] == 'running':
+        st.sidebar.caption("⏳ Warming up data and charts…") # 仅在预热进行中提示；失败时只记录日志，不再提示
     
     # --- 数据加载 (Data Loading) ---
-    raw_df = io.load_data(DATA_PATH) # 调用 io 模块加载原始数据（使用了缓存）
+    # 加载并清洗数据：结果按文件内容指纹跨会话缓存，重新运行时不再重复清洗
+    with perf.span('load') as timing:
+        df = io.load_prepared(DATA_PATH, chunksize=CHUNKSIZE, workers=WORKERS)
+        timing['rows'] = len(df)
     
-    if raw_df.empty: # 检查数据框是否为空
+    if df.empty: # 检查数据框是否为空
         st.stop() # 如果为空，则停止应用执行
-        
-    df = prep.clean_data(raw_df) # 调用 prep 模块清洗数据，得到最终使用的数据框
+
+    with perf.span('load_derived'):
+        index = io.load_index(DATA_PATH) # 国家/类型/演员/导演的倒排索引（随数据一起缓存）
+        base_cube = io.load_cube(DATA_PATH) # 全量数据的聚合计数立方体（随数据一起缓存）
     
     # --- 全局过滤器逻辑 (Global Filter Logic) ---
     # 仅在分析页面显示过滤器
     if page != "Introduction":
         st.sidebar.markdown("---") # 添加分隔线
         st.sidebar.subheader("🛠️ Filters") # 添加过滤器副标题
+
+        # 过滤器 0: 全文检索（标题、简介、演员、导演；支持前缀匹配）
+        query = st.sidebar.text_input("Search", placeholder="Title, person or keyword") # 创建搜索框
+        with perf.span('search') as timing:
+            search_index = io.load_search(DATA_PATH) if query.strip() else None # 倒排词索引（首次构建后保存在数据文件旁）
+            matched_rows = search.matches(search_index, query) if search_index else None # 命中标题的行位置
+            timing['rows'] = None if matched_rows is None else len(matched_rows)
         
         # 过滤器 1: 内容类型 (Type)
         all_types = df['type'].unique().tolist() # 获取所有内容类型（Movie, TV Show）
         selected_types = st.sidebar.multiselect("Content Type", all_types, default=all_types) # 创建多选框
         
         # 过滤器 2: 年份范围 (Year Range)
-        valid_years = df['added_year'].dropna() # 获取非空的添加年份
-        if not valid_years.empty: # 确保有有效的年份数据
-            min_year = int(valid_years.min()) # 数据集中的最小年份
-            max_year = int(valid_years.max()) # 数据集中的最大年份
-            default_start = 2015 if 2015 > min_year else min_year # 设置默认起始年份，确保不早于 2015 且不小于最小年份
+        years = prep.year_range(df) # 数据集中的最小/最大年份，以及默认起始年份（不早于 2015 且不小于最小年份）
+        if years: # 确保有有效的年份数据
+            min_year, max_year, default_start = years
             
             selected_years = st.sidebar.slider( # 创建滑块选择年份范围
                 "Date Added Range",
@@ -98,14 +123,41 @@ def main():
         # 获取所有国家，排除 'Unknown'，并排序
         all_countries = sorted(list(set([c for c in df['primary_country'].unique() if c and c != 'Unknown'])))
         selected_countries = st.sidebar.multiselect("Primary Country", all_countries) # 创建多选框
+
+        # 过滤器 4-6: 类型、演员、导演（选项直接取自倒排索引的键）
+        selected_genres = st.sidebar.multiselect("Genre", sorted(index['genre'])) # 创建多选框
+        selected_cast = st.sidebar.multiselect("Cast Member", sorted(index['cast'])) # 创建多选框
+        selected_directors = st.sidebar.multiselect("Director", sorted(index['director'])) # 创建多选框
         
-        # 应用过滤器
-        filtered_df = prep.filter_data(df, selected_types, selected_years, selected_countries) # 调用 prep 模块过滤数据
+        # 应用过滤器：所有条件合并为一组行位置，只取当前页面图表需要的列（不复制整张宽表）
+        page_columns = getattr(section, 'COLUMNS', None)
+        with perf.span('filter') as timing:
+            filtered_df = prep.filter_data(df, selected_types, selected_years, selected_countries,
+                                           selected_genres, selected_cast, selected_directors,
+                                           index=index, columns=page_columns,
+                                           selected_rows=matched_rows) # 调用 prep 模块过滤数据；检索结果与其他条件取交集
+            timing['rows'] = len(filtered_df)
+        
+        # 图表所需的聚合：只有类型/年份过滤时直接切片全量立方体，否则由过滤后的行重新聚合一次
+        with perf.span('aggregate') as timing:
+            if selected_countries or selected_genres or selected_cast or selected_directors or matched_rows is not None:
+                page_cube = cube.build_cube(filtered_df)
+            else:
+                page_cube = cube.slice_cube(base_cube, selected_types, selected_years)
+            timing['cells'] = len(page_cube['titles'])
+        
+        # 过滤状态的规范哈希：相同数据和相同筛选条件的会话共享已构建的图表
+        state = figcache.filter_state(io.catalog_version(DATA_PATH), selected_types, selected_years, selected_countries,
+                                      selected_genres, selected_cast, selected_directors, query)
+        with perf.span('serve_export') as timing:
+            timing['preset'] = export.serve(EXPORT_DIR, state) # 命中预设时把预渲染图表放入图表缓存
         
         # 显示当前筛选出的标题数量
         st.sidebar.info(f"Showing: {len(filtered_df)} titles")
     else:
         filtered_df = df # 如果在 Introduction 页面，则不过滤，使用全部数据
+        page_cube = base_cube
+        state = None
 
     # --- 学生信息 (Student Info) 在侧边栏底部 ---
     # 添加分隔线和间距，将信息推向底部
@@ -127,15 +179,28 @@ def main():
     
     # --- 页面路由 (Page Routing) ---
     st.title("Netflix Content Strategy Report") # 设置主页面的主要标题
+
+    # 检索结果：按相关度排序列出当前筛选范围内的前 20 个标题
+    if page != "Introduction" and matched_rows is not None:
+        rows, _ = search.search(search_index, query, within=filtered_df.index.to_numpy(), limit=20)
+        with st.expander(f"🔎 {len(filtered_df)} titles match \"{query.strip()}\"", expanded=True):
+            columns = [c for c in ['title', 'type', 'release_year', 'director', 'primary_country'] if c in df.columns]
+            st.dataframe(df.iloc[rows][columns], hide_index=True, use_container_width=True)
     
-    if page == "Introduction": # 根据侧边栏的选择进行页面切换
-        intro.show(df) # 显示 Introduction 页面内容，使用原始数据
-    elif page == "Macro Overview": 
-        overview.show(filtered_df) # 显示 Macro Overview 页面内容，使用过滤后的数据
-    elif page == "Deep Dive Analysis": 
-        deep_dives.show(filtered_df) # 显示 Deep Dive Analysis 页面内容，使用过滤后的数据
-    elif page == "Conclusions": 
-        conclusions.show() # 显示 Conclusions 页面内容
+    with perf.span(f"page:{page}"): # 页面渲染计时（包含其中每个图表的构建）
+        if page == "Introduction": # 根据侧边栏的选择进行页面切换
+            section.show(df, io.load_text(DATA_PATH, df.head(5))) # 显示 Introduction 页面内容；预览行按需补齐全文字段
+        elif page == "Macro Overview": 
+            section.show(page_cube, state) # 显示 Macro Overview 页面内容，使用过滤后的聚合立方体
+        elif page == "Deep Dive Analysis": 
+            section.show(filtered_df, page_cube, state, data_path=DATA_PATH) # 显示 Deep Dive Analysis 页面内容，使用过滤后的数据和聚合立方体；相似标题标签页按需加载模型
+        elif page == "Conclusions": 
+            section.show() # 显示 Conclusions 页面内容
+
+    # --- 性能记录 (Instrumentation) ---
+    run = perf.finish_run(METRICS_FILE) # 结束计时，写入日志/指标文件
+    if DEBUG_PANEL or st.query_params.get("debug") == "1":
+        perf.show_panel(run) # 在侧边栏显示本次运行的耗时明细
 
 if __name__ == "__main__": # 检查是否作为主程序运行
     main() # 调用主函数启动应用
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Serial vs parallel prep.clean_data at several catalog sizes.
+
+Catalogs are synthetic (see benchmarks/synthetic.py). Run from the repo root:
+
+    python -m benchmarks.bench_clean --rows 50000 200000 1000000 --workers 4
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_catalog
+from utils import prep
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default='Ntitles.csv')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rows':>10} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    for rows in args.rows:
+        df = make_catalog(rows, args.source)
+        serial, expected = best_of(lambda: prep.clean_data(df), args.repeat)
+        parallel, result = best_of(lambda: prep.clean_data_parallel(df, args.workers, min_rows=0), args.repeat)
+        pd.testing.assert_frame_equal(expected, result)
+
+        results.append({'rows': rows, 'workers': args.workers, 'serial_s': serial, 'parallel_s': parallel})
+        print(f"{rows:>10} {serial:>10.3f} {parallel:>11.3f} {serial / parallel:>7.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+"""
+Concurrent-session load test of app.py, in-process with Streamlit's headless AppTest (no server, no browser).
+
+Each simulated session is its own AppTest (its own session state and script run) on its own thread, so
+sessions share the process-wide caches exactly as they do behind a real server. Sessions replay a
+scenario of navigation and filter steps; every step is one timed rerun.
+
+    python -m benchmarks.load --sessions 8 --scenario mixed --rounds 2 --out load_output.json
+    python -m benchmarks.load --compare before.json after.json
+
+The report holds rerun latency percentiles (overall and per step kind), peak RSS and the resident memory
+added per open session.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import ExitStack, nullcontext
+from unittest.mock import patch
+
+import numpy as np
+import streamlit
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import magic
+from streamlit.testing.v1 import AppTest, app_test
+from streamlit.testing.v1.util import patch_config_options
+
+from benchmarks.suite import git_commit
+
+try:
+    import resource
+except ImportError: # Windows: peak RSS then comes from the sampler only
+    resource = None
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+PERCENTILES = [50, 90, 95, 99]
+# RSS sampling interval of the memory monitor while sessions run
+SAMPLE_SECONDS = 0.05
+
+# Scenarios: sequences of (action, value) steps; each step is one rerun
+SCENARIOS = {
+    # Visit every page and every lazily rendered section
+    'browse': [
+        ('page', 'Macro Overview'),
+        ('tab', 'Release Trends & Seasonality'),
+        ('page', 'Deep Dive Analysis'),
+        ('tab', '⏱️ Duration & Operations'),
+        ('tab', '🎭 Genres'),
+        ('tab', '👥 Talent & Ratings'),
+        ('page', 'Conclusions'),
+    ],
+    # Drag the year slider on the deep dive page, one rerun per slider position
+    'slider': [('page', 'Deep Dive Analysis')] + [('years', (start, 2021)) for start in range(2008, 2021, 2)],
+    # Narrow down with the multi-valued filters and the search box, then clear them again
+    'filters': [
+        ('page', 'Deep Dive Analysis'),
+        ('select', ('Primary Country', ['India'])),
+        ('select', ('Genre', ['Dramas'])),
+        ('tab', '👥 Talent & Ratings'),
+        ('select', ('Genre', [])),
+        ('search', 'love'),
+        ('search', ''),
+        ('select', ('Primary Country', [])),
+    ],
+}
+# 'mixed' gives the sessions the scenarios above in turn
+MIXED = ['browse', 'slider', 'filters']
+
+def rss_mb():
+    """Current resident set size of the process, in MB (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_mb():
+    """Peak resident set size of the process so far, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3 # bytes on macOS, KB on Linux
+
+class Sampler(threading.Thread):
+    """Samples the RSS every SAMPLE_SECONDS until stopped; keeps the highest value."""
+
+    def __init__(self):
+        super().__init__(name='rss-sampler', daemon=True)
+        self.peak = rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(SAMPLE_SECONDS):
+            current = rss_mb()
+            if current is not None:
+                self.peak = max(self.peak or 0, current)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+def concurrent_apptests():
+    """
+    AppTest assumes one app run at a time per process. Three pieces of process-global state break when
+    sessions overlap, so they are patched for the duration of a load test (the returned ExitStack undoes it):
+    - each run patches config.get_option to report global.appTest and restores it when done, switching
+      the option off under the sessions still running, whose widgets then skip the test bookkeeping that
+      the next rerun looks up (KeyError on a widget id). The option is set once for the whole test instead.
+    - each run installs its own mock Runtime as the singleton and clears it when done, so the sessions
+      still running drop to bare mode mid-rerun. The first mock installed is kept and serves every
+      session (a real server also has one Runtime).
+    - each run parses app.py again, which fails when threads parse at once (CPython's AST recursion
+      check is not thread-safe), so parsing is serialized.
+    """
+    shared = {}
+    parse_lock = threading.Lock()
+    add_magic = magic.add_magic
+
+    def current(cls):
+        if 'runtime' not in shared and cls._instance is not None:
+            shared['runtime'] = cls._instance
+        return shared.get('runtime')
+
+    def instance(cls):
+        runtime = current(cls)
+        if runtime is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return runtime
+
+    def exists(cls):
+        return current(cls) is not None
+
+    def locked_add_magic(code, script_path):
+        with parse_lock:
+            return add_magic(code, script_path)
+
+    stack = ExitStack()
+    stack.enter_context(patch_config_options({'global.appTest': True}))
+    stack.enter_context(patch.object(app_test, 'patch_config_options', lambda overrides: nullcontext()))
+    stack.enter_context(patch.object(Runtime, 'instance', classmethod(instance)))
+    stack.enter_context(patch.object(Runtime, 'exists', classmethod(exists)))
+    stack.enter_context(patch.object(magic, 'add_magic', locked_add_magic))
+    return stack
+
+def _widget(elements, label):
+    return next(w for w in elements if w.label == label)
+
+def step(at, action, value):
+    """Apply one scenario step to a session and rerun it."""
+    if action == 'page':
+        _widget(at.sidebar.radio, 'Navigate').set_value(value)
+    elif action == 'tab':
+        # Section selectors are collapsed radios (see sections/nav.py); pick the one offering the tab
+        next(r for r in at.main.radio if value in r.options).set_value(value)
+    elif action == 'years':
+        _widget(at.sidebar.slider, 'Date Added Range').set_value(value)
+    elif action == 'select':
+        label, values = value
+        _widget(at.sidebar.multiselect, label).set_value(values)
+    elif action == 'search':
+        _widget(at.sidebar.text_input, 'Search').set_value(value)
+    else:
+        raise ValueError(f"Unknown step action: {action}")
+    at.run()
+
+def run_session(number, scenario, rounds, timeout, start, records, sessions):
+    """
+    One simulated visitor: open the app, then replay the scenario `rounds` times.
+    Appends one record per rerun: (session, action, seconds, error).
+    """
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    sessions[number] = at # kept open until memory is measured
+    start.wait()
+    steps = [('open', None)] + SCENARIOS[scenario] * rounds
+    for action, value in steps:
+        began = time.perf_counter()
+        error = None
+        try:
+            if action == 'open':
+                at.run()
+            else:
+                step(at, action, value)
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        records.append((number, action, time.perf_counter() - began, error))
+        if error and action == 'open':
+            break
+
+def _latency(seconds):
+    seconds = np.asarray(seconds) * 1000
+    if not len(seconds):
+        return {}
+    stats = {f"p{p}": float(np.percentile(seconds, p)) for p in PERCENTILES}
+    stats.update(mean=float(seconds.mean()), max=float(seconds.max()), count=len(seconds))
+    return stats
+
+class _Ready:
+    """Stand-in for the start barrier when a single session runs alone."""
+
+    def wait(self):
+        return 0
+
+def run(sessions, scenario='mixed', rounds=1, timeout=300, warm=True):
+    """
+    Run `sessions` concurrent sessions and return the report.
+    With warm=True one session browses the app first (not measured), so the run measures steady-state
+    reruns rather than the first catalog load; its time is reported as 'warm_seconds'.
+    """
+    # app.py reads its data and exports relative to its own folder, as under `streamlit run`
+    os.chdir(os.path.dirname(APP))
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'streamlit': streamlit.__version__,
+        'sessions': sessions,
+        'scenario': scenario,
+        'rounds': rounds,
+    }
+    with concurrent_apptests():
+        return _run(report, sessions, scenario, rounds, timeout, warm)
+
+def _run(report, sessions, scenario, rounds, timeout, warm):
+    if warm:
+        began = time.perf_counter()
+        warm_records = []
+        run_session(0, 'browse', 1, timeout, _Ready(), warm_records, {})
+        report['warm_seconds'] = time.perf_counter() - began
+        report['warm_errors'] = [r[3] for r in warm_records if r[3]]
+
+    baseline = rss_mb()
+    records, open_sessions = [], {}
+    start = threading.Barrier(sessions + 1) # every session starts its first rerun at the same moment
+    threads = [threading.Thread(target=run_session, name=f"session-{i}",
+                                args=(i, MIXED[i % len(MIXED)] if scenario == 'mixed' else scenario,
+                                      rounds, timeout, start, records, open_sessions))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    sampler = Sampler()
+    sampler.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - began
+    peak = sampler.stop()
+    loaded = rss_mb()
+
+    # Failed reruns stop early, so only successful ones count towards latency; failures are listed instead
+    succeeded = [r for r in records if not r[3]]
+    by_action = {}
+    for _, action, seconds, _ in succeeded:
+        by_action.setdefault(action, []).append(seconds)
+    report.update({
+        'wall_seconds': wall,
+        'reruns': len(records),
+        'reruns_per_second': len(records) / wall if wall else None,
+        'latency_ms': _latency([r[2] for r in succeeded]),
+        'latency_ms_by_step': {action: _latency(seconds) for action, seconds in sorted(by_action.items())},
+        'errors': [{'session': r[0], 'step': r[1], 'error': str(r[3])} for r in records if r[3]],
+        'rss_mb': {'baseline': baseline, 'sampled_peak': peak, 'process_peak': peak_rss_mb(), 'after': loaded},
+        # Memory still held with every session open, spread over the sessions (caches they filled included)
+        'per_session_mb': (loaded - baseline) / sessions if loaded is not None and baseline is not None else None,
+    })
+    open_sessions.clear()
+    return report
+
+def compare(before_path, after_path):
+    """Print latency percentiles and memory of two reports side by side."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    runs = [f"{r.get('commit')} ({r['sessions']} sessions, {r['scenario']} x{r['rounds']})" for r in (before, after)]
+    print(" -> ".join(runs))
+    rows = [(f"latency {key}", before['latency_ms'].get(key), after['latency_ms'].get(key))
+            for key in [f"p{p}" for p in PERCENTILES] + ['max']]
+    rows += [(f"rss {key}", before['rss_mb'].get(key), after['rss_mb'].get(key)) for key in ('sampled_peak', 'process_peak')]
+    rows.append(('per_session_mb', before.get('per_session_mb'), after.get('per_session_mb')))
+    for name, old, new in rows:
+        if old is None or new is None:
+            continue
+        ratio = new / old if old else float('inf')
+        flag = '  <-- worse' if ratio > 1.2 else ''
+        print(f"{name:<22} {old:>10.1f} {new:>10.1f} {ratio:>6.2f}x{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS) + ['mixed'], default='mixed')
+    parser.add_argument('--rounds', type=int, default=1, help='times each session replays its scenario')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds allowed per rerun')
+    parser.add_argument('--cold', action='store_true', help='skip the warm-up session (measure the first load too)')
+    parser.add_argument('--out', default='load_output.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two reports and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Bare-mode notices (missing ScriptRunContext on worker threads, deprecations) would drown the report;
+    # the config option keeps the level when AppTest reapplies the configuration
+    streamlit.config.set_option('logger.level', 'error')
+    streamlit.logger.set_log_level('error')
+    out = os.path.abspath(args.out) # run() moves to the app's folder
+    report = run(args.sessions, args.scenario, args.rounds, args.timeout, warm=not args.cold)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    latency = report['latency_ms']
+    print(f"{report['sessions']} sessions, {report['reruns']} reruns in {report['wall_seconds']:.1f}s "
+          f"({report['reruns_per_second']:.1f}/s), {len(report['errors'])} errors")
+    if latency:
+        print("latency ms  " + "  ".join(f"{key} {latency[key]:.0f}" for key in [f"p{p}" for p in PERCENTILES] + ['max']))
+    for action, stats in report['latency_ms_by_step'].items():
+        print(f"  {action:<8} n={stats['count']:<4} p50 {stats['p50']:>7.0f}  p95 {stats['p95']:>7.0f}  max {stats['max']:>7.0f}")
+    memory = dict(report['rss_mb'], per_session=report['per_session_mb'])
+    print("RSS MB  " + "  ".join(f"{key} {value:.0f}" if value is not None else f"{key} n/a" for key, value in memory.items()))
+
+    failures = report['errors'] + [{'session': 'warm-up', 'error': e} for e in report.get('warm_errors', [])]
+    if failures:
+        for failure in failures[:5]:
+            print(f"error in session {failure['session']}: {failure['error']}", file=sys.stderr)
+        sys.exit(f"{len(failures)} failed reruns; latencies cover the successful ones only")
+
+if __name__ == '__main__':
+    main()
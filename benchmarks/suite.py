@@ -0,0 +1,153 @@
+"""
+Benchmark suite: load, clean, filter and every chart builder on synthetic catalogs.
+
+Runs headless (no Streamlit server) and writes a JSON report that can be compared across commits:
+
+    python -m benchmarks.suite --rows 10000 100000 1000000 --out bench.json
+    python -m benchmarks.suite --compare before.json after.json
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import make_catalog
+from utils import store, prep, cube, viz, talent
+
+# Representative sidebar states: (name, filter_data keyword arguments)
+FILTERS = [
+    ('none', {}),
+    ('movies', {'selected_types': ['Movie']}),
+    ('default', {'selected_types': ['Movie', 'TV Show'], 'selected_years': (2015, 2021)}),
+    ('countries', {'selected_years': (2015, 2021), 'selected_countries': ['United States', 'India']}),
+    ('genre_country', {'selected_countries': ['United Kingdom'], 'selected_genres': ['Dramas', 'Comedies']}),
+    ('director', {'selected_directors': ['Martin Scorsese', 'Steven Spielberg']}),
+]
+
+def chart_builders():
+    """Every viz.plot_* figure builder (the KPI cards draw Streamlit widgets, not a figure)."""
+    return {name: func for name, func in inspect.getmembers(viz, inspect.isfunction)
+            if name.startswith('plot_') and name != 'plot_kpi_cards'}
+
+def measure(func, repeat=1):
+    """
+    Best wall time over `repeat` untraced runs, plus the peak traced allocation of one extra run
+    (tracing slows the code down, so it is kept out of the timings). Returns (stats, result).
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 1e6}, result
+
+def load_uncached(path):
+    """store.load_data with its raw-CSV cache emptied first, so every run reads the file."""
+    store._read_csv.cache_clear()
+    return store.load_data(path)
+
+def run_size(rows, source, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.csv')
+        make_catalog(rows, source).to_csv(path, index=False)
+
+        results['load_data'], raw = measure(lambda: load_uncached(path), repeat)
+        results['clean_data'], df = measure(lambda: prep.clean_data(raw), repeat)
+    results['build_index'], index = measure(lambda: prep.build_index(df), repeat)
+    results['build_cube'], base_cube = measure(lambda: cube.build_cube(df), repeat)
+    results['build_talent'], graph = measure(lambda: talent.build_talent(index, len(df)), repeat)
+
+    for name, kwargs in FILTERS:
+        args = dict({'selected_types': None, 'selected_years': None, 'selected_countries': None}, **kwargs)
+        stats, filtered = measure(lambda: prep.filter_data(df, index=index, **args), repeat)
+        results[f'filter_data[{name}]'] = dict(stats, rows=len(filtered))
+
+    # Charts are built on the default sidebar state, as on a first visit
+    default = dict(FILTERS[2][1])
+    filtered = prep.filter_data(df, default['selected_types'], default['selected_years'], None, index=index)
+    agg = cube.slice_cube(base_cube, default['selected_types'], default['selected_years'])
+    positions = filtered.index.to_numpy()
+    # Chart input by the builder's first parameter name
+    inputs = {
+        'agg': agg,
+        'df': filtered,
+        'people': talent.top_people(graph, positions, 'director'),
+        'metrics': talent.central_people(graph, positions),
+        'pairs': talent.top_pairs(graph, positions),
+        'results': filtered.head(10).assign(similarity=1.0),
+    }
+    for name, builder in chart_builders().items():
+        data = inputs[next(iter(inspect.signature(builder).parameters))]
+        stats, fig = measure(lambda: builder(data), repeat)
+        json_stats, payload = measure(fig.to_json)
+        results[name] = dict(stats, serialize_seconds=json_stats['seconds'], json_bytes=len(payload))
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(before_path, after_path):
+    """Print the time ratio (after / before) of every benchmark present in both reports."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for rows, stages in after['sizes'].items():
+        for stage, stats in stages.items():
+            old = before['sizes'].get(rows, {}).get(stage)
+            if old and old['seconds'] > 0:
+                ratio = stats['seconds'] / old['seconds']
+                flag = '  <-- slower' if ratio > 1.2 else ''
+                print(f"{rows:>9} {stage:<32} {old['seconds']:>9.4f}s {stats['seconds']:>9.4f}s {ratio:>6.2f}x{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default='Ntitles.csv')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default='bench_output.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two reports and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'sizes': {},
+    }
+    for rows in args.rows:
+        print(f"{rows} rows...", file=sys.stderr)
+        report['sizes'][str(rows)] = run_size(rows, args.source, args.repeat)
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    for rows, stages in report['sizes'].items():
+        for stage, stats in stages.items():
+            extra = f" {stats['json_bytes']:>9} B" if 'json_bytes' in stats else ''
+            print(f"{rows:>9} {stage:<32} {stats['seconds']:>9.4f}s {stats['peak_mb']:>8.1f} MB{extra}")
+
+if __name__ == '__main__':
+    main()
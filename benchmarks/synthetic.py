@@ -0,0 +1,26 @@
+"""
+Synthetic catalogs shaped like Ntitles.csv, for benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+def make_catalog(rows, source='Ntitles.csv', seed=0):
+    """
+    A catalog of `rows` titles with Ntitles.csv's columns: every column is sampled independently
+    (with replacement, seeded) from the source's values, so value distributions, missing-value rates
+    and text lengths match while show_ids and titles stay unique.
+    """
+    raw = pd.read_csv(source)
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: raw[col].to_numpy()[rng.integers(0, len(raw), rows)] for col in raw.columns})
+
+    # Keep movie/show specific fields consistent with the sampled type
+    by_type = {t: group['duration'].dropna().to_numpy() for t, group in raw.groupby('type')}
+    for t, durations in by_type.items():
+        mask = (df['type'] == t).to_numpy()
+        df.loc[mask, 'duration'] = durations[rng.integers(0, len(durations), mask.sum())]
+
+    ids = pd.Series(np.arange(1, rows + 1)).astype(str)
+    df['show_id'] = 's' + ids
+    df['title'] = df['title'].astype(str) + ' #' + ids
+    return df
@@ -1,57 +1,138 @@
 import streamlit as st
-from utils import viz
+from utils import viz, cube, figcache, io, search, similar, talent
+from sections import nav
 
-def show(df):
+# Columns read by this page's row-level charts and by the cube; the filtered frame is projected to these
+COLUMNS = cube.COLUMNS + ['duration_min', 'seasons', 'primary_genre', 'added_day']
+
+# Columns listed for recommended titles
+RESULT_COLUMNS = ['title', 'type', 'release_year', 'primary_genre', 'primary_country']
+
+def _results(catalog, rows, scores):
+    results = catalog.iloc[rows][[c for c in RESULT_COLUMNS if c in catalog.columns]].copy()
+    results['similarity'] = scores.round(3)
+    return results
+
+def show(df, agg, state=None, lazy=True, data_path=None):
     st.markdown("## 🕵️‍♂️ Deep Dive Analysis")
     st.write("Granular breakdown by Geography, Duration, Content DNA, and Production.")
     
-    tab1, tab2, tab3, tab4 = st.tabs(["🌍 Geography", "⏱️ Duration & Operations", "🎭 Genres", "👥 Talent & Ratings"])
+    # Lazy mode only builds the selected tab's charts; hidden tabs are None
+    tab1, tab2, tab3, tab4, tab5 = nav.tabs(["🌍 Geography", "⏱️ Duration & Operations", "🎭 Genres",
+                                             "👥 Talent & Ratings", "🔗 Similar Titles"],
+                                            key="deep_dive_tab", lazy=lazy)
     
     # --- Tab 1: Geography ---
-    with tab1:
-        st.subheader("Global Content Footprint")
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.plotly_chart(viz.plot_world_map(df), use_container_width=True)
-        with col2:
-            st.plotly_chart(viz.plot_top_countries_bar(df), use_container_width=True)
+    if tab1 is not None:
+        with tab1:
+            st.subheader("Global Content Footprint")
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.plotly_chart(figcache.figure(viz.plot_world_map, agg, state), use_container_width=True)
+            with col2:
+                st.plotly_chart(figcache.figure(viz.plot_top_countries_bar, agg, state), use_container_width=True)
         
-        st.markdown("**Globalization Strategy**: While the US dominates, significant clusters in India, UK, and South Korea highlight a 'Local-for-Global' acquisition strategy.")
+            st.markdown("**Globalization Strategy**: While the US dominates, significant clusters in India, UK, and South Korea highlight a 'Local-for-Global' acquisition strategy.")
 
     # --- Tab 2: Duration ---
-    with tab2:
-        st.subheader("Technical Characteristics")
+    if tab2 is not None:
+        with tab2:
+            st.subheader("Technical Characteristics")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(viz.plot_movie_duration_hist(df), use_container_width=True)
-        with col2:
-            st.plotly_chart(viz.plot_tv_seasons_bar(df), use_container_width=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(figcache.figure(viz.plot_movie_duration_hist, df, state), use_container_width=True)
+            with col2:
+                st.plotly_chart(figcache.figure(viz.plot_tv_seasons_bar, df, state), use_container_width=True)
             
-        col3, col4 = st.columns(2)
-        with col3:
-            st.plotly_chart(viz.plot_duration_scatter(df), use_container_width=True)
-        with col4:
-            st.plotly_chart(viz.plot_genre_duration_box(df), use_container_width=True)
+            col3, col4 = st.columns(2)
+            with col3:
+                st.plotly_chart(figcache.figure(viz.plot_duration_scatter, df, state), use_container_width=True)
+            with col4:
+                st.plotly_chart(figcache.figure(viz.plot_genre_duration_box, df, state), use_container_width=True)
             
-        st.caption("Release Logic: We also analyzed on which day of the month content drops.")
-        st.plotly_chart(viz.plot_added_day_bar(df), use_container_width=True)
-        st.info("💡 **Insight**: There is a massive spike on the 1st of the month, indicating a batch-release operational model for licensed content.")
+            st.caption("Release Logic: We also analyzed on which day of the month content drops.")
+            st.plotly_chart(figcache.figure(viz.plot_added_day_bar, df, state), use_container_width=True)
+            st.info("💡 **Insight**: There is a massive spike on the 1st of the month, indicating a batch-release operational model for licensed content.")
 
     # --- Tab 3: Genres ---
-    with tab3:
-        st.subheader("Thematic Composition")
-        st.plotly_chart(viz.plot_genre_treemap(df), use_container_width=True)
-        st.plotly_chart(viz.plot_genre_bar(df), use_container_width=True)
+    if tab3 is not None:
+        with tab3:
+            st.subheader("Thematic Composition")
+            st.plotly_chart(figcache.figure(viz.plot_genre_treemap, agg, state), use_container_width=True)
+            st.plotly_chart(figcache.figure(viz.plot_genre_bar, agg, state), use_container_width=True)
 
     # --- Tab 4: Talent & Ratings ---
-    with tab4:
-        st.subheader("Audience & Creators")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(viz.plot_rating_bar(df), use_container_width=True)
-        with col2:
-            st.plotly_chart(viz.plot_rating_stack(df), use_container_width=True)
+    if tab4 is not None:
+        with tab4:
+            st.subheader("Audience & Creators")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(figcache.figure(viz.plot_rating_bar, agg, state), use_container_width=True)
+            with col2:
+                st.plotly_chart(figcache.figure(viz.plot_rating_stack, agg, state), use_container_width=True)
             
-        st.divider()
-        st.plotly_chart(viz.plot_directors_bar(df), use_container_width=True)
\ No newline at end of file
+            st.divider()
+            if data_path is None:
+                st.info("Talent charts are available in the live dashboard.")
+            else:
+                # People and collaborations come from the cached talent graph; only the filtered rows are looked up
+                graph = io.load_talent(data_path)
+                positions = df.index.to_numpy() if len(df) < graph['n_rows'] else None
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.plotly_chart(figcache.figure(viz.plot_directors_bar,
+                                                    lambda: talent.top_people(graph, positions, 'director'), state),
+                                    use_container_width=True)
+                with col2:
+                    st.plotly_chart(figcache.figure(viz.plot_cast_bar,
+                                                    lambda: talent.top_people(graph, positions, 'cast'), state),
+                                    use_container_width=True)
+                st.plotly_chart(figcache.figure(viz.plot_collaboration_bar,
+                                                lambda: talent.top_pairs(graph, positions), state),
+                                use_container_width=True)
+                st.plotly_chart(figcache.figure(viz.plot_centrality_scatter,
+                                                lambda: talent.central_people(graph, positions), state),
+                                use_container_width=True)
+                st.info("💡 **Insight**: Co-directed titles credit each director, and recurring cast/director pairings reveal the production networks behind regional catalogs.")
+
+    # --- Tab 5: Similar Titles ---
+    if tab5 is not None:
+        with tab5:
+            st.subheader("Titles Like This")
+            if data_path is None:
+                st.info("Similar titles are available in the live dashboard.")
+                return
+
+            catalog = io.load_prepared(data_path)
+            model = io.load_similar(data_path)
+            filtered = len(df) < len(catalog)
+            within = df.index.to_numpy() if filtered else None
+
+            query = st.text_input("Find a title", placeholder="Start typing a title or name", key="similar_query")
+            if query.strip():
+                options = search.search(io.load_search(data_path), query, within=within, limit=20)[0]
+            else:
+                options = df.index.to_numpy()[:20]
+            if not len(options):
+                st.warning("No title matches the search within the current filters.")
+                return
+
+            chosen = st.selectbox("Title", options, key="similar_title",
+                                  format_func=lambda p: f"{catalog['title'].iat[p]} ({catalog['release_year'].iat[p]})")
+            rows, scores = similar.like(model, [chosen], k=10, within=within)[0]
+            if len(rows):
+                st.plotly_chart(viz.plot_similar_bar(_results(catalog, rows, scores),
+                                                     f"Most Similar to “{catalog['title'].iat[chosen]}”"),
+                                use_container_width=True)
+            else:
+                st.info("No similar titles found within the current filters.")
+            st.caption("Similarity compares description wording (TF-IDF) and shared genres.")
+
+            # Titles outside the filtered selection that are closest to it as a whole
+            if filtered and len(df):
+                st.divider()
+                st.subheader("Closest to the Current Selection")
+                rows, scores = similar.nearest(model, df.index.to_numpy(), k=10)
+                st.dataframe(_results(catalog, rows, scores), hide_index=True, use_container_width=True)
+                st.info("💡 **Insight**: These titles are not in the filtered selection but resemble it most — candidates to widen a themed collection.")
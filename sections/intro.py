@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 
-def show(df):
+def show(df, preview=None):
     st.markdown("## 📖 Executive Summary & Data Scope")
     
     st.markdown("""
@@ -21,7 +21,7 @@ def show(df):
     
     with col1:
         st.markdown("**Dataset Preview:**")
-        st.dataframe(df.head(5), use_container_width=True)
+        st.dataframe(df.head(5) if preview is None else preview, use_container_width=True)
     
     with col2:
         st.markdown("**Data Health Check:**")
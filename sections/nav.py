@@ -0,0 +1,15 @@
+import streamlit as st
+
+def tabs(labels, key, lazy=True):
+    """
+    Drop-in for st.tabs that can render lazily.
+    With lazy=True a horizontal selector picks one tab: its container is returned and every other
+    slot is None, so callers skip building (and shipping) the hidden tabs' charts.
+    With lazy=False this is plain st.tabs: every tab is a container and all of them run.
+    """
+    if not lazy:
+        return st.tabs(labels)
+
+    active = st.radio(key, labels, horizontal=True, key=key, label_visibility="collapsed")
+    container = st.container()
+    return [container if label == active else None for label in labels]
@@ -1,32 +1,40 @@
 import streamlit as st
-from utils import viz
+from utils import viz, cube, figcache, aggregates
+from sections import nav
 
-def show(df):
+# Columns read by this page; everything is drawn from the aggregate cube, so only its inputs are needed
+COLUMNS = cube.COLUMNS
+
+def show(agg, state=None, lazy=True):
     st.markdown("## 📈 Macro Trends: Growth & Velocity")
     st.write("High-level metrics indicating platform scale and acquisition velocity.")
     
     # KPI Section
-    total = len(df)
-    movies = len(df[df['type'] == 'Movie'])
-    tv = len(df[df['type'] == 'TV Show'])
-    viz.plot_kpi_cards(total, movies, tv)
+    viz.plot_kpi_cards(**aggregates.kpis(agg))
     
     st.divider()
     
+    # Lazy mode only builds the selected section's charts; hidden sections are None
+    row1, row2 = nav.tabs(["Composition & Growth", "Release Trends & Seasonality"], key="overview_section", lazy=lazy)
+
     # Row 1: Composition and Growth
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(viz.plot_type_donut(df), use_container_width=True)
-    with col2:
-        st.plotly_chart(viz.plot_added_area(df), use_container_width=True)
-        
-    st.info("💡 **Insight**: The catalog has seen exponential growth post-2015. While movies constitute the majority, the acceleration of TV Show acquisitions signifies a strategic pivot toward retention-focused serial content.")
+    if row1 is not None:
+        with row1:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(figcache.figure(viz.plot_type_donut, agg, state), use_container_width=True)
+            with col2:
+                st.plotly_chart(figcache.figure(viz.plot_added_area, agg, state), use_container_width=True)
+                
+            st.info("💡 **Insight**: The catalog has seen exponential growth post-2015. While movies constitute the majority, the acceleration of TV Show acquisitions signifies a strategic pivot toward retention-focused serial content.")
 
     # Row 2: Release Trends and Seasonality
-    col3, col4 = st.columns(2)
-    with col3:
-        st.plotly_chart(viz.plot_release_line(df), use_container_width=True)
-    with col4:
-        st.plotly_chart(viz.plot_heatmap(df), use_container_width=True)
-        
-    st.markdown("**Operational Insight**: The heatmap reveals a strong Q4 (October-December) bias in content releases, likely aligning with holiday viewership spikes and awards season eligibility.")
\ No newline at end of file
+    if row2 is not None:
+        with row2:
+            col3, col4 = st.columns(2)
+            with col3:
+                st.plotly_chart(figcache.figure(viz.plot_release_line, agg, state), use_container_width=True)
+            with col4:
+                st.plotly_chart(figcache.figure(viz.plot_heatmap, agg, state), use_container_width=True)
+                
+            st.markdown("**Operational Insight**: The heatmap reveals a strong Q4 (October-December) bias in content releases, likely aligning with holiday viewership spikes and awards season eligibility.")
\ No newline at end of file
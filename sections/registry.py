@@ -0,0 +1,77 @@
+"""
+Page registry: section modules are imported when their page is first shown, not at app start.
+
+The analysis pages pull in utils.viz and with it Plotly, which the Introduction and Conclusions
+pages never use. Importing on demand keeps process start and those pages free of that cost.
+First-import times are recorded per module and show up as `import:<module>` perf spans.
+
+    python -m sections.registry    # cold import cost of each page, each in a fresh interpreter
+"""
+import importlib
+import subprocess
+import sys
+import threading
+import time
+
+from utils import perf
+
+# Navigation label -> section module, in sidebar order
+PAGES = {
+    "Introduction": "sections.intro",
+    "Macro Overview": "sections.overview",
+    "Deep Dive Analysis": "sections.deep_dives",
+    "Conclusions": "sections.conclusions",
+}
+# Modules imported by every page anyway; the cold measurement imports them before timing a page
+BASELINE = ['streamlit', 'pandas', 'numpy', 'utils.io', 'utils.prep']
+
+# module name -> seconds its first import took in this process
+IMPORT_TIMES = {}
+_LOCK = threading.Lock()
+
+def load(page):
+    """
+    The section module of a page, imported on first use.
+    """
+    name = PAGES[page]
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    with _LOCK, perf.span(f"import:{name}") as timing:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+        timing['seconds_first'] = IMPORT_TIMES[name]
+    return module
+
+def import_times():
+    """
+    First-import seconds of the section modules loaded so far in this process.
+    """
+    with _LOCK:
+        return dict(IMPORT_TIMES)
+
+def measure(page):
+    """
+    Cold import cost of a page: seconds to import its module in a fresh interpreter after BASELINE,
+    and whether that pulled in Plotly.
+    """
+    code = (
+        "import importlib, sys, time\n"
+        f"for name in {BASELINE!r}: importlib.import_module(name)\n"
+        "start = time.perf_counter()\n"
+        f"importlib.import_module({PAGES[page]!r})\n"
+        "print(time.perf_counter() - start, 'plotly.express' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+    return {'seconds': float(out[0]), 'plotly': out[1] == 'True'}
+
+def main():
+    print(f"{'page':<22}{'import':>10}  plotly")
+    for page in PAGES:
+        cost = measure(page)
+        print(f"{page:<22}{cost['seconds'] * 1000:>8.1f}ms  {'yes' if cost['plotly'] else 'no'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Start the Streamlit server with the data and chart caches warming up in the background,
+so the first visitor does not pay for loading, cleaning and rendering the default view.
+
+    python serve.py [--data Ntitles.csv] [--exports exports] [--ready-file /tmp/ready] [--port 8501]
+"""
+import argparse
+import os
+
+from streamlit.web import bootstrap
+
+from utils import warmup
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app with a background warm-up.")
+    parser.add_argument('--data', default='Ntitles.csv', help="catalog CSV to warm up")
+    parser.add_argument('--exports', default='exports', help="pre-rendered export directory, if any")
+    parser.add_argument('--ready-file', default=None, help="file created once the warm-up is done")
+    parser.add_argument('--port', type=int, default=None)
+    args = parser.parse_args()
+
+    # The warm-up thread lives in the server process, so app.py sessions share what it builds
+    warmup.start(args.data, export_dir=args.exports, ready_file=args.ready_file)
+
+    # Same steps as `streamlit run`: apply config flags, then start the server on this process
+    flags = {'server_port': args.port}
+    bootstrap.load_config_options(flags)
+    bootstrap.run(APP, False, [], flags)
+
+if __name__ == '__main__':
+    main()
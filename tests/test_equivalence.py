@@ -0,0 +1,132 @@
+"""
+Vectorized analytics against straightforward reference implementations on a slice of the real catalog:
+similar titles, the talent graph, chart downsampling and date parsing.
+"""
+import itertools
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import store, prep, similar, talent, downsample
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Ntitles.csv')
+ROWS = 1_500
+
+@pytest.fixture(scope='module')
+def catalog():
+    return prep.clean_data(pd.read_csv(CATALOG, dtype=store.RAW_DTYPES, nrows=ROWS))
+
+def _dense(model):
+    """The model's title x feature matrix, dense."""
+    matrix = np.zeros((model['n_rows'], len(model['names'])), dtype=np.float64)
+    rows = np.repeat(np.arange(model['n_rows']), np.diff(model['indptr']))
+    matrix[rows, model['features']] = model['values']
+    return matrix
+
+def _check_top(rows, scores, reference, k):
+    """rows/scores are a best-first top k of the reference scores (ties may pick either title)."""
+    expected = np.sort(reference[reference > 0])[::-1][:k]
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert np.allclose(reference[rows], scores, atol=1e-5)
+
+def test_similar_scores_equal_dense_cosine(catalog):
+    model = similar.build_model(catalog)
+    matrix = _dense(model)
+    assert np.allclose(np.linalg.norm(matrix[np.diff(model['indptr']) > 0], axis=1), 1, atol=1e-5)
+
+    queries = [0, 17, 400, ROWS - 1]
+    within = np.arange(0, ROWS, 3)
+    for query, (rows, scores) in zip(queries, similar.like(model, queries, k=10)):
+        reference = matrix @ matrix[query]
+        reference[query] = 0
+        _check_top(rows, scores, reference, 10)
+    for query, (rows, scores) in zip(queries, similar.like(model, queries, k=5, within=within)):
+        reference = matrix @ matrix[query]
+        reference[query] = 0
+        outside = np.ones(ROWS, dtype=bool)
+        outside[within] = False
+        reference[outside] = 0
+        _check_top(rows, scores, reference, 5)
+
+    members = np.arange(100, 160)
+    rows, scores = similar.nearest(model, members, k=10)
+    centroid = matrix[members].sum(axis=0)
+    reference = matrix @ (centroid / np.linalg.norm(centroid))
+    reference[members] = 0
+    _check_top(rows, scores, reference, 10)
+
+def _people(catalog, column):
+    """Names credited in a column per title, split like prep.build_index."""
+    names = catalog[column].astype(str).str.split(',').explode().str.strip()
+    names = names[(names != '') & (names != 'Unknown')]
+    return names.groupby(level=0).agg(lambda values: sorted(set(values)))
+
+def test_talent_counts_equal_reference(catalog):
+    graph = talent.build_talent(prep.build_index(catalog), len(catalog))
+    positions = np.arange(0, ROWS, 2)
+    directors, cast = _people(catalog, 'director'), _people(catalog, 'cast')
+
+    for role, credited in (('director', directors), ('cast', cast)):
+        reference = Counter(name for names in credited[credited.index.isin(positions)] for name in names)
+        people = talent.top_people(graph, positions, role, k=10)
+        assert people['count'].tolist() == sorted(reference.values(), reverse=True)[:10]
+        assert all(reference[name] == count for name, count in zip(people['name'], people['count']))
+
+    # Collaborations: every pair of distinct people credited on a title, in any role
+    everyone = pd.concat([directors, cast]).groupby(level=0).agg(lambda lists: sorted(set().union(*lists)))
+    reference = Counter(pair for names in everyone[everyone.index.isin(positions)]
+                        for pair in itertools.combinations(names, 2))
+    pairs = talent.top_pairs(graph, positions, k=10)
+    assert pairs['count'].tolist() == sorted(reference.values(), reverse=True)[:10]
+    assert all(reference[tuple(sorted((a, b)))] == count
+               for a, b, count in zip(pairs['first'], pairs['second'], pairs['count']))
+
+    unfiltered = talent.top_pairs(graph, k=10)
+    everyone_reference = Counter(pair for names in everyone for pair in itertools.combinations(names, 2))
+    assert unfiltered['count'].tolist() == sorted(everyone_reference.values(), reverse=True)[:10]
+
+def test_downsampled_statistics_equal_reference(catalog):
+    movies = catalog[catalog['type'] == 'Movie']
+    durations = movies['duration_min'].dropna().astype(float)
+
+    bins = downsample.histogram(movies['duration_min'], nbins=50)
+    counts, edges = np.histogram(durations, bins=50)
+    assert bins['count'].tolist() == counts.tolist()
+    assert np.allclose(bins['left'], edges[:-1]) and np.allclose(bins['right'], edges[1:])
+
+    stats = downsample.box_stats(movies['duration_min'], movies['primary_genre'].astype(object))
+    for genre, values in movies.dropna(subset=['duration_min']).groupby('primary_genre', observed=True)['duration_min']:
+        values = values.to_numpy(dtype=float)
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        inside = values[(values >= q1 - 1.5 * (q3 - q1)) & (values <= q3 + 1.5 * (q3 - q1))]
+        row = stats.loc[genre]
+        assert np.allclose([row['q1'], row['median'], row['q3'], row['mean'], row['n']],
+                           [q1, median, q3, values.mean(), len(values)])
+        assert (row['lowerfence'], row['upperfence']) == (inside.min(), inside.max())
+
+    cells = downsample.density(movies, 'release_year', 'duration_min', bins=(200, 30))
+    present = movies.dropna(subset=['release_year', 'duration_min'])
+    assert cells['count'].sum() == len(present)
+    # Fewer distinct years than bins: that axis keeps its exact values
+    by_year = cells.groupby('release_year')['count'].sum()
+    assert by_year.to_dict() == present['release_year'].astype(float).value_counts().to_dict()
+
+def test_parse_dates_equals_per_value_parsing():
+    raw = pd.read_csv(CATALOG, dtype=store.RAW_DTYPES, nrows=ROWS)['date_added'].astype(str).str.strip()
+    extra = pd.Series(['', 'nan', 'January 5, 2020', 'Jan 5, 2020', '2020-01-05', '05-Jan-20', '01/05/2020',
+                       '5 January 2020', 'not a date'])
+    values = pd.concat([raw, extra, raw.iloc[:50]], ignore_index=True)
+    before = dict(prep.DATE_STATS)
+    parsed = prep.parse_dates(values)
+    # Each distinct string is parsed once
+    assert prep.DATE_STATS['unique'] - before['unique'] == values.nunique()
+
+    reference = pd.Series([pd.to_datetime(v, errors='coerce') if v not in prep.NULL_DATES else pd.NaT
+                           for v in values], dtype='datetime64[ns]')
+    assert parsed['date_added_dt'].astype('datetime64[ns]').equals(reference.rename('date_added_dt'))
+    assert parsed['added_year'].astype('Float64').equals(reference.dt.year.astype('Float64').rename('added_year'))
+    assert parsed['added_day'].astype('Float64').equals(reference.dt.day.astype('Float64').rename('added_day'))
+    assert (parsed['added_month'].astype(object).fillna('') == reference.dt.month_name().fillna('')).all()
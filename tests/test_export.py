@@ -0,0 +1,46 @@
+"""
+Serving pre-rendered exports: damaged artifacts fall back to live rendering instead of failing the page.
+"""
+import os
+import shutil
+
+import pytest
+
+from utils import export, figcache, store
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Ntitles.csv')
+
+@pytest.fixture(scope='module')
+def exported(tmp_path_factory):
+    folder = tmp_path_factory.mktemp('export')
+    path = str(folder / 'titles.csv')
+    shutil.copy(CATALOG, path)
+    store.clear_cache()
+    manifest = export.export(path, str(folder / 'exports'), ['default'])
+    yield str(folder / 'exports'), manifest['presets']['default']
+    store.clear_cache()
+    figcache.clear_cache()
+
+def test_damaged_charts_are_skipped(exported):
+    out_dir, entry = exported
+    missing, corrupt, *intact = entry['charts']
+    os.remove(os.path.join(out_dir, 'default', f"{missing}.json"))
+    with open(os.path.join(out_dir, 'default', f"{corrupt}.json"), 'r+') as f:
+        f.truncate(10)
+
+    figcache.clear_cache()
+    assert export.serve(out_dir, entry['state']) == 'default'
+    assert not figcache.contains(missing, entry['state'])
+    assert not figcache.contains(corrupt, entry['state'])
+    assert all(figcache.contains(name, entry['state']) for name in intact)
+
+def test_truncated_manifest_serves_nothing(exported):
+    out_dir, entry = exported
+    path = os.path.join(out_dir, export.MANIFEST)
+    with open(path, 'r+') as f:
+        f.truncate(20)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1)) # a new mtime, so the parsed manifest is not reused
+
+    figcache.clear_cache()
+    assert export.serve(out_dir, entry['state']) is None
+    assert figcache.cache_info()['entries'] == 0
@@ -0,0 +1,69 @@
+"""
+Search index maintenance: updating an index in place against building it again.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import search
+
+def _catalog(n, seed=0):
+    """Synthetic titles with every searched field, words drawn from a Zipf-like vocabulary."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{i}" for i in range(20_000)], dtype=object)
+    def text(words):
+        picks = np.minimum(rng.zipf(1.3, size=(n, words)) - 1, len(vocabulary) - 1)
+        return pd.Series([' '.join(row) for row in vocabulary[picks]])
+    return pd.DataFrame({'title': text(2), 'director': text(1), 'cast': text(3), 'description': text(12)})
+
+def test_small_delta_cost_follows_delta_not_catalog():
+    df = _catalog(100_000)
+    started = time.perf_counter()
+    index = search.build_search(df)
+    build_seconds = time.perf_counter() - started
+
+    old_positions = np.array([7, 50_000, 99_999])
+    new_rows = _catalog(3, seed=1)
+    started = time.perf_counter()
+    updated = search.update_search(index, df.iloc[old_positions], old_positions, new_rows, old_positions)
+    update_seconds = time.perf_counter() - started
+
+    assert updated['n_rows'] == len(df)
+    assert update_seconds < build_seconds / 10
+
+@pytest.mark.parametrize('old_columns', [list(search.FIELDS), ['title']]) # ['title']: a streamed frame
+def test_updated_index_equals_rebuild(old_columns):
+    df = _catalog(2_000)
+    index = search.build_search(df)
+
+    # Row 3 gets a new title, row 1000 new text everywhere, and one title is added at the end
+    changed = df.iloc[[3, 1_000]].copy()
+    changed.loc[changed.index[0], 'title'] = 'Replacement Heading'
+    changed.iloc[1] = _catalog(1, seed=1).iloc[0].to_numpy()
+    added = pd.DataFrame({'title': ['Brandnew Story'], 'director': ['w1'], 'cast': ['w2 w3'],
+                          'description': ['w4 replacement']})
+    new_rows = pd.concat([changed, added], ignore_index=True)
+    old_positions = np.array([3, 1_000])
+    updated = search.update_search(index, df.iloc[old_positions][old_columns], old_positions,
+                                   new_rows, np.array([3, 1_000, 2_000]))
+
+    merged = pd.concat([df, added], ignore_index=True)
+    merged.iloc[old_positions] = changed.to_numpy()
+    rebuilt = search.build_search(merged)
+
+    assert updated['n_rows'] == rebuilt['n_rows'] == 2_001
+    assert np.array_equal(updated['terms'], rebuilt['terms'])
+    assert np.array_equal(updated['offsets'], rebuilt['offsets'])
+    assert np.array_equal(updated['rows'], rebuilt['rows'])
+    assert np.allclose(updated['weights'], rebuilt['weights'])
+
+    old_title = df['title'].iat[3]
+    queries = [old_title, 'replacement heading', 'replacement', 'brandnew', 'brand', 'w4 replace', 'w1 w2',
+               df['description'].iat[1_000]]
+    for query in queries:
+        assert np.array_equal(search.matches(updated, query), search.matches(rebuilt, query)), query
+        assert all(np.array_equal(a, b) for a, b in zip(search.search(updated, query), search.search(rebuilt, query)))
+    assert 3 in search.matches(updated, 'replacement heading')
+    assert 2_000 in search.matches(updated, 'brandnew')
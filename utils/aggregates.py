@@ -0,0 +1,123 @@
+"""
+The numbers behind the KPI cards and every chart, as plain frames, without Plotly or Streamlit.
+utils/viz.py draws them; utils/batch.py writes them out for many filter specs at once.
+Functions take the (sliced) aggregate cube, the filtered frame or the talent graph, like the charts do.
+"""
+import pandas as pd
+
+from utils import cube, downsample, talent
+
+# Columns the row-level series read from a filtered frame
+COLUMNS = ['type', 'release_year', 'duration_min', 'seasons', 'listed_in', 'primary_genre', 'added_day']
+
+def kpis(agg):
+    """Headline counts shown in the KPI cards."""
+    return {
+        'total': cube.total(agg['titles']),
+        'movies': cube.total(agg['titles'], type='Movie'),
+        'tv': cube.total(agg['titles'], type='TV Show'),
+    }
+
+def _counts(series, name):
+    """value_counts as a two-column frame; unobserved categories of a categorical are dropped."""
+    counts = series.value_counts()
+    counts = counts[counts > 0].reset_index()
+    counts.columns = [name, 'count']
+    return counts
+
+def _movies(df, *columns):
+    return df[df['type'] == 'Movie'].dropna(subset=list(columns))
+
+# --- Cube series ---
+
+def type_counts(agg):
+    return cube.counts(agg['titles'], ['type'], sort=True)
+
+def added_by_year(agg):
+    return cube.counts(agg['titles'], ['added_year', 'type'])
+
+def release_by_year(agg, since=1990):
+    data = cube.counts(agg['titles'], ['release_year', 'type'])
+    return data[data['release_year'] > since] # Focus on modern era
+
+def added_by_month(agg):
+    return cube.counts(agg['titles'], ['added_year', 'added_month_num'])
+
+def country_counts(agg):
+    data = cube.counts(agg['titles'], ['primary_country'], sort=True).rename(columns={'primary_country': 'country'})
+    return data[data['country'] != 'Unknown']
+
+def top_countries(agg, k=10):
+    """The k countries with the most titles, 'Unknown' taking a slot but not shown."""
+    data = cube.counts(agg['titles'], ['primary_country'], sort=True).head(k).rename(columns={'primary_country': 'country'})
+    return data[data['country'] != 'Unknown']
+
+def top_genres(agg, k=10):
+    return cube.counts(agg['genres'], ['genre'], sort=True).head(k)
+
+def rating_counts(agg):
+    return cube.counts(agg['titles'], ['rating'], sort=True)
+
+def rating_by_type(agg):
+    return cube.counts(agg['titles'], ['rating', 'type'])
+
+# --- Row-level series ---
+
+def duration_histogram(df, nbins=50):
+    return downsample.histogram(_movies(df, 'duration_min')['duration_min'], nbins=nbins)
+
+def duration_box(df):
+    """Box statistics of movie durations, indexed 'all'."""
+    return downsample.box_stats(_movies(df, 'duration_min')['duration_min'])
+
+def season_counts(df):
+    data = df[df['type'] == 'TV Show'].dropna(subset=['seasons'])
+    return _counts(data['seasons'], 'seasons')
+
+def duration_density(df):
+    return downsample.density(_movies(df, 'duration_min', 'release_year'), 'release_year', 'duration_min')
+
+def genre_duration_box(df, k=8):
+    """Box statistics of movie durations for the k most common primary genres, indexed by genre in that order."""
+    data = _movies(df, 'duration_min', 'listed_in')
+    genres = _counts(data['primary_genre'], 'genre').head(k)['genre']
+    data = data[data['primary_genre'].isin(genres)]
+    stats = downsample.box_stats(data['duration_min'], data['primary_genre'])
+    return stats.reindex(pd.Index(genres, name='genre'))
+
+def added_day_counts(df):
+    counts = df['added_day'].dropna().value_counts().sort_index().reset_index()
+    counts.columns = ['day', 'count']
+    return counts
+
+# --- Talent series (positions: row positions of the filtered titles, None for all) ---
+
+def top_directors(graph, positions=None, k=10):
+    return talent.top_people(graph, positions, 'director', k)
+
+def top_cast(graph, positions=None, k=10):
+    return talent.top_people(graph, positions, 'cast', k)
+
+# Every series by name, with the input it reads: 'agg' (sliced cube), 'df' (filtered frame, COLUMNS)
+# or 'talent' (talent graph and filtered positions)
+SERIES = {
+    'type_counts': ('agg', type_counts),
+    'added_by_year': ('agg', added_by_year),
+    'release_by_year': ('agg', release_by_year),
+    'added_by_month': ('agg', added_by_month),
+    'country_counts': ('agg', country_counts),
+    'top_countries': ('agg', top_countries),
+    'top_genres': ('agg', lambda agg: top_genres(agg, 20)),
+    'rating_counts': ('agg', rating_counts),
+    'rating_by_type': ('agg', rating_by_type),
+    'duration_histogram': ('df', duration_histogram),
+    'duration_box': ('df', duration_box),
+    'season_counts': ('df', season_counts),
+    'duration_density': ('df', duration_density),
+    'genre_duration_box': ('df', genre_duration_box),
+    'added_day_counts': ('df', added_day_counts),
+    'top_directors': ('talent', top_directors),
+    'top_cast': ('talent', top_cast),
+    'top_pairs': ('talent', talent.top_pairs),
+    'central_people': ('talent', talent.central_people),
+}
@@ -0,0 +1,182 @@
+"""
+Headless KPI and chart-series aggregates for many filter specs at once.
+
+    python -m utils.batch [--data Ntitles.csv] [--specs specs.json] [--out aggregates] [--format json|parquet]
+
+A spec file maps names to filters, e.g. {"india_dramas": {"countries": ["India"], "genres": ["Dramas"]}},
+with the keys of SPEC_KEYS; "years" is [from, to], "default" (the app's default range) or "all".
+Without --specs the export presets are used (see utils/export.py).
+
+The catalog is loaded, cleaned and indexed once (utils/store.py, no Streamlit), every spec is resolved
+to row positions through the inverted index, and the cubes of all specs are counted in one grouped pass
+(cube.build_cubes); type/year-only specs are sliced from the catalog cube without touching rows.
+Output: aggregates.json ({spec: {filters, kpis, series}}) or kpis.parquet plus one <series>.parquet per
+chart series, each with a 'spec' column.
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from utils import store, prep, cube, search, aggregates, export
+
+# Spec keys -> prep.filter_positions arguments
+SPEC_KEYS = {
+    'types': 'selected_types',
+    'years': 'selected_years',
+    'countries': 'selected_countries',
+    'genres': 'selected_genres',
+    'cast': 'selected_cast',
+    'directors': 'selected_directors',
+}
+FORMATS = ('json', 'parquet')
+
+def read_specs(path):
+    """
+    Filter specs from a JSON file: an object of name -> spec, or a list of specs with a 'name'.
+    """
+    with open(path) as f:
+        specs = json.load(f)
+    if isinstance(specs, list):
+        specs = {spec['name']: {k: v for k, v in spec.items() if k != 'name'} for spec in specs}
+    for name, spec in specs.items():
+        unknown = set(spec) - set(SPEC_KEYS) - {'query'}
+        if unknown:
+            raise ValueError(f"Spec {name!r} has unknown keys: {', '.join(sorted(unknown))}")
+    return specs
+
+def preset_specs(df):
+    """
+    The export presets as specs, resolved against the catalog like the app's sidebar does.
+    """
+    specs = {}
+    for preset in export.PRESETS:
+        types, years = export.resolve(preset, df)
+        specs[preset] = {'types': types, 'years': list(years) if years else None}
+    return specs
+
+def _years(years, df):
+    if years in (None, 'all'):
+        return None
+    if years == 'default':
+        bounds = prep.year_range(df)
+        return None if bounds is None else (bounds[2], bounds[1])
+    return tuple(years)
+
+def _positions(df, index, search_index, spec):
+    """
+    Sorted row positions matching a spec, or None for the whole catalog.
+    """
+    arguments = {SPEC_KEYS[key]: spec.get(key) for key in SPEC_KEYS}
+    arguments['selected_years'] = _years(spec.get('years'), df)
+    query = spec.get('query') or ''
+    arguments['selected_rows'] = search.matches(search_index, query) if query.strip() else None
+    return prep.filter_positions(df, index=index, **arguments)
+
+def _cube_only(spec):
+    """Specs filtering on type and years only can be sliced from the catalog cube."""
+    return not any(spec.get(key) for key in SPEC_KEYS if key not in ('types', 'years')) and not spec.get('query')
+
+def compute(data_path, specs=None, series=None):
+    """
+    KPIs and chart series of every spec: {name: {'filters', 'titles', 'kpis', 'series': {name: frame}}}.
+    `series` restricts the output to some of aggregates.SERIES (all when None).
+    """
+    df = store.load_prepared(data_path)
+    if specs is None:
+        specs = preset_specs(df)
+    series = {name: aggregates.SERIES[name] for name in (series or aggregates.SERIES)}
+    inputs = {kind for kind, _ in series.values()}
+
+    index = store.load_index(data_path)
+    base_cube = store.load_cube(data_path)
+    search_index = store.load_search(data_path) if any((s.get('query') or '').strip() for s in specs.values()) else None
+    graph = store.load_talent(data_path) if 'talent' in inputs else None
+    positions = {name: _positions(df, index, search_index, spec) for name, spec in specs.items()}
+
+    # One grouped pass builds the cubes of every spec the catalog cube cannot be sliced for
+    stacked = [name for name, spec in specs.items() if positions[name] is not None and not _cube_only(spec)]
+    cubes = dict(zip(stacked, cube.build_cubes(df, [positions[name] for name in stacked])))
+    for name, spec in specs.items():
+        if name not in cubes:
+            cubes[name] = cube.slice_cube(base_cube, spec.get('types'), _years(spec.get('years'), df))
+
+    frame = df[[c for c in aggregates.COLUMNS if c in df.columns]] if 'df' in inputs else None
+    results = {}
+    for name, spec in specs.items():
+        rows = positions[name]
+        filtered = None if frame is None else frame if rows is None else frame.iloc[rows]
+        data = {'agg': cubes[name], 'df': filtered}
+        values = {}
+        for series_name, (kind, func) in series.items():
+            values[series_name] = func(graph, rows) if kind == 'talent' else func(data[kind])
+        results[name] = {
+            'filters': spec,
+            'titles': len(df) if rows is None else len(rows),
+            'kpis': aggregates.kpis(cubes[name]),
+            'series': values,
+        }
+    return results
+
+def _table(frame):
+    """A series frame as a flat table: a meaningful index (box statistics) becomes a column."""
+    if isinstance(frame.index, pd.RangeIndex) and frame.index.name is None:
+        return frame
+    return frame.rename_axis(frame.index.name or 'group').reset_index()
+
+def write(results, out_dir, fmt='json', version=None):
+    """
+    Write computed aggregates to out_dir in one of FORMATS. Returns the written paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if fmt == 'json':
+        payload = {'version': version, 'specs': {}}
+        for name, result in results.items():
+            payload['specs'][name] = {
+                'filters': result['filters'],
+                'titles': result['titles'],
+                'kpis': result['kpis'],
+                # to_json turns numpy scalars, NaN and NA into plain JSON values
+                'series': {key: json.loads(_table(frame).to_json(orient='records'))
+                           for key, frame in result['series'].items()},
+            }
+        path = os.path.join(out_dir, 'aggregates.json')
+        with open(path, 'w') as f:
+            json.dump(payload, f, indent=1)
+        return [path]
+
+    paths = []
+    kpis = pd.DataFrame([dict(spec=name, titles=result['titles'], **result['kpis']) for name, result in results.items()])
+    paths.append(os.path.join(out_dir, 'kpis.parquet'))
+    kpis.to_parquet(paths[-1], index=False)
+    for key in next(iter(results.values()))['series'] if results else []:
+        # Categories differ between specs, so categorical columns are written as plain values
+        table = pd.concat([_table(result['series'][key]).assign(spec=name) for name, result in results.items()],
+                          ignore_index=True)
+        table = table[['spec'] + [c for c in table.columns if c != 'spec']]
+        for column in table.columns:
+            if isinstance(table[column].dtype, pd.CategoricalDtype):
+                table[column] = table[column].astype(object)
+        paths.append(os.path.join(out_dir, f"{key}.parquet"))
+        table.to_parquet(paths[-1], index=False)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Write KPI and chart-series aggregates for many filter specs.")
+    parser.add_argument('--data', default='Ntitles.csv')
+    parser.add_argument('--specs', help="JSON file of filter specs (default: the export presets)")
+    parser.add_argument('--out', default='aggregates')
+    parser.add_argument('--format', choices=FORMATS, default='json')
+    parser.add_argument('--series', nargs='+', choices=sorted(aggregates.SERIES))
+    args = parser.parse_args()
+
+    specs = read_specs(args.specs) if args.specs else None
+    results = compute(args.data, specs, args.series)
+    paths = write(results, args.out, args.format, store.catalog_version(args.data))
+    for name, result in results.items():
+        print(f"{name}: {result['titles']:,} titles, {len(result['series'])} series")
+    print(f"Wrote {len(paths)} file(s) to {args.out}")
+
+if __name__ == '__main__':
+    main()
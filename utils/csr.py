@@ -0,0 +1,64 @@
+"""
+Compressed sparse rows shared by the search index, the similarity model and the talent graph:
+entries grouped by key, with pointers[key]:pointers[key + 1] the range of a key's entries.
+Also their persistence as tagged .npz files next to the catalog (see store.load_search / load_similar).
+"""
+import os
+
+import numpy as np
+
+def pointers(keys, size):
+    """
+    Pointer array of `size` keys for entries sorted by key (keys: the key of every entry).
+    """
+    pointers = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=pointers[1:])
+    return pointers
+
+def spans(pointers, keys):
+    """
+    Positions of every entry of the given keys, key by key.
+    """
+    lengths = pointers[keys + 1] - pointers[keys]
+    return np.repeat(pointers[keys] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+def _blob(text):
+    return np.frombuffer(text.encode(), dtype=np.uint8)
+
+def save(structure, path, tag):
+    """
+    Write a structure (dict of arrays, string arrays and ints) to an .npz file, tagged for load to check.
+    String arrays are stored as one newline-joined blob. Written through a temporary file,
+    so a reader never sees it half written.
+    """
+    text = [key for key, value in structure.items() if isinstance(value, np.ndarray) and value.dtype == object]
+    arrays = {key: _blob('\n'.join(value)) if key in text else np.asarray(value) for key, value in structure.items()}
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, tag=_blob(tag), text=_blob('\n'.join(text)), **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+def load(path, tag):
+    """
+    Read a structure written by save. Returns None when the file is missing, unreadable or has another tag.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as stored:
+            if stored['tag'].tobytes().decode() != tag:
+                return None
+            text = stored['text'].tobytes().decode().split('\n')
+            structure = {}
+            for key in stored.files:
+                if key in ('tag', 'text'):
+                    continue
+                value = stored[key]
+                if key in text:
+                    blob = value.tobytes().decode()
+                    structure[key] = np.array(blob.split('\n') if blob else [], dtype=object)
+                else:
+                    structure[key] = int(value) if value.ndim == 0 else value
+            return structure
+    except Exception:
+        return None
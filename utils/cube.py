@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from utils import prep
+
+# Dimensions of the title-level cube; one row per observed combination
+DIMENSIONS = ['type', 'added_year', 'added_month_num', 'release_year', 'rating', 'primary_country']
+# Dimensions of the genre cube: a title counts once per listed genre, so genres get their own cube
+GENRE_DIMENSIONS = ['type', 'added_year', 'genre']
+# Columns build_cube reads from a (filtered) frame
+COLUMNS = DIMENSIONS + ['listed_in']
+
+def build_cube(df):
+    """
+    Count cube of the catalog: {'titles': counts over DIMENSIONS, 'genres': counts over GENRE_DIMENSIONS}.
+    Each is a long frame of observed combinations with a 'count' column; missing dimension values are kept as NA.
+    """
+    titles = df.groupby(DIMENSIONS, observed=True, dropna=False).size().reset_index(name='count')
+
+    genres = df[['type', 'added_year']].join(prep.explode_genres(df).rename('genre'))
+    genres = genres.groupby(GENRE_DIMENSIONS, observed=True, dropna=False).size().reset_index(name='count')
+    return {'titles': titles, 'genres': genres}
+
+def build_cubes(df, subsets):
+    """
+    Cubes of several (possibly overlapping) row subsets of df, given as arrays of row positions,
+    from one grouped pass over the stacked subsets instead of one build_cube per subset.
+    Returns a list of cubes in the order of `subsets`.
+    """
+    sizes = [len(rows) for rows in subsets]
+    rows = np.concatenate([np.asarray(r, dtype=np.int64) for r in subsets]) if subsets else np.empty(0, dtype=np.int64)
+    stacked = df.iloc[rows][[c for c in COLUMNS if c in df.columns]].reset_index(drop=True)
+    stacked.insert(0, 'subset', np.repeat(np.arange(len(subsets)), sizes))
+
+    titles = stacked.groupby(['subset'] + DIMENSIONS, observed=True, dropna=False).size().reset_index(name='count')
+    genres = stacked[['subset', 'type', 'added_year']].join(prep.explode_genres(stacked).rename('genre'))
+    genres = genres.groupby(['subset'] + GENRE_DIMENSIONS, observed=True, dropna=False).size().reset_index(name='count')
+
+    cubes = []
+    for name, cells in [('titles', titles), ('genres', genres)]:
+        bounds = np.searchsorted(cells['subset'].to_numpy(), np.arange(len(subsets) + 1))
+        for i in range(len(subsets)):
+            part = cells.iloc[bounds[i]:bounds[i + 1]].drop(columns='subset').reset_index(drop=True)
+            if name == 'titles':
+                cubes.append({'titles': part})
+            else:
+                cubes[i]['genres'] = part
+    return cubes
+
+def merge_cubes(parts):
+    """
+    Sum cubes cell by cell (cubes of disjoint row sets, or negated cubes to subtract rows).
+    Cells whose count drops to zero are removed.
+    """
+    merged = {}
+    for name, dims in [('titles', DIMENSIONS), ('genres', GENRE_DIMENSIONS)]:
+        cells = pd.concat([part[name] for part in parts], ignore_index=True)
+        cells = cells.groupby(dims, observed=True, dropna=False)['count'].sum().reset_index()
+        cells = cells[cells['count'] != 0].reset_index(drop=True)
+        # Mixed categories fall back to object on concat; restore the compact dtype
+        for dim in dims:
+            if isinstance(parts[0][name][dim].dtype, pd.CategoricalDtype):
+                cells[dim] = cells[dim].astype('category')
+        merged[name] = cells
+    return merged
+
+def update_cube(cube, old_rows, old_positions, new_rows, new_positions):
+    """
+    Cube after old_rows were replaced by new_rows: their cells are subtracted and added,
+    so the cost depends on the number of changed rows and cube cells, not on the catalog size.
+    """
+    removed = {name: cells.assign(count=-cells['count']) for name, cells in build_cube(old_rows).items()}
+    return merge_cubes([cube, removed, build_cube(new_rows)])
+
+def slice_cube(cube, selected_types, selected_years):
+    """
+    Restrict the cube to the type and year-range filters (same semantics as prep.filter_data).
+    """
+    sliced = {}
+    for name, cells in cube.items():
+        mask = pd.Series(True, index=cells.index)
+        if selected_types:
+            mask &= cells['type'].isin(selected_types)
+        if selected_years:
+            min_year, max_year = selected_years
+            mask &= ((cells['added_year'] >= min_year) & (cells['added_year'] <= max_year)).fillna(False)
+        sliced[name] = cells[mask]
+    return sliced
+
+def counts(cells, dims, sort=False):
+    """
+    Roll the cube up to `dims`: a frame of dims + 'count'.
+    Combinations with a missing value are dropped; sort=True orders by descending count.
+    """
+    data = cells.groupby(dims, observed=True)['count'].sum().reset_index()
+    data = data[data['count'] > 0]
+    if sort:
+        data = data.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+    return data
+
+def total(cells, **where):
+    """
+    Number of titles in the cube cells matching the equality conditions in `where`.
+    """
+    mask = pd.Series(True, index=cells.index)
+    for dim, value in where.items():
+        mask &= cells[dim] == value
+    return int(cells.loc[mask, 'count'].sum())
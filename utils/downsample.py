@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Fixed seed so sampled charts are stable across reruns and sessions (and cacheable)
+SEED = 42
+
+def sample(df, n, seed=SEED):
+    """
+    Deterministic random sample of at most n rows.
+    """
+    if len(df) <= n:
+        return df
+    return df.sample(n, random_state=seed)
+
+def _values(series):
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+def histogram(series, nbins=50):
+    """
+    Equal-width histogram of a numeric series: frame of left, right, center, count (one row per bin).
+    """
+    values = _values(series)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return pd.DataFrame({col: np.empty(0) for col in ['left', 'right', 'center', 'count']})
+    counts, edges = np.histogram(values, bins=nbins)
+    return pd.DataFrame({
+        'left': edges[:-1],
+        'right': edges[1:],
+        'center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts,
+    })
+
+def box_stats(series, groups=None):
+    """
+    Box-plot statistics (q1, median, q3, Tukey whiskers, mean, n) of a numeric series, per group if given.
+    Whiskers are the most extreme values within 1.5 IQR of the quartiles, as Plotly draws them.
+    """
+    data = pd.DataFrame({'value': _values(series)})
+    data['group'] = 'all' if groups is None else groups.to_numpy()
+    data = data.dropna()
+    if data.empty:
+        return pd.DataFrame(columns=['q1', 'median', 'q3', 'mean', 'n', 'lowerfence', 'upperfence'])
+
+    grouped = data.groupby('group', observed=True, sort=False)['value']
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    stats['mean'] = grouped.mean()
+    stats['n'] = grouped.size()
+
+    iqr = stats['q3'] - stats['q1']
+    data = data.join((stats['q1'] - 1.5 * iqr).rename('low'), on='group')
+    data = data.join((stats['q3'] + 1.5 * iqr).rename('high'), on='group')
+    inside = data[(data['value'] >= data['low']) & (data['value'] <= data['high'])]
+    stats['lowerfence'] = inside.groupby('group', observed=True)['value'].min()
+    stats['upperfence'] = inside.groupby('group', observed=True)['value'].max()
+    return stats
+
+def density(df, x, y, bins=(60, 60)):
+    """
+    2-D binned counts of two numeric columns: frame of x, y (bin centers) and count, non-empty bins only.
+    Columns with fewer distinct values than bins keep their exact values (no binning on that axis).
+    """
+    xs, ys = _values(df[x]), _values(df[y])
+    keep = ~(np.isnan(xs) | np.isnan(ys))
+    xs, ys = xs[keep], ys[keep]
+
+    def centers(values, nbins):
+        if len(np.unique(values)) <= nbins:
+            return values
+        edges = np.histogram_bin_edges(values, bins=nbins)
+        idx = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, nbins - 1)
+        return ((edges[:-1] + edges[1:]) / 2)[idx]
+
+    cells = pd.DataFrame({x: centers(xs, bins[0]), y: centers(ys, bins[1])})
+    return cells.groupby([x, y]).size().reset_index(name='count')
@@ -0,0 +1,166 @@
+"""
+Pre-rendered report export for the most visited filter presets.
+
+    python -m utils.export [--data Ntitles.csv] [--out exports] [--presets default movies]
+
+Runs the Macro Overview and Deep Dive sections headlessly for each preset and writes, per preset,
+every figure as JSON, a static HTML report and the KPI values, plus a manifest keyed on the
+figure-cache filter state. The app serves those figures whenever a rerun's filter state matches
+(serve()); presets exported from other data never match, because the state includes the catalog version.
+"""
+import argparse
+import json
+import os
+import threading
+
+from utils import store, prep, cube, figcache, aggregates
+
+# name -> (content types or None for all, 'default' (2015 onwards) or 'all' years)
+PRESETS = {
+    'default': (None, 'default'),
+    'all_years': (None, 'all'),
+    'movies': (['Movie'], 'default'),
+    'tv_shows': (['TV Show'], 'default'),
+}
+MANIFEST = 'manifest.json'
+
+# Parsed manifests per export directory: path -> (mtime, manifest)
+_MANIFESTS = {}
+_LOCK = threading.Lock()
+
+def resolve(preset, df):
+    """
+    Sidebar values (selected_types, selected_years) a preset stands for, resolved like app.py does.
+    """
+    types, years = PRESETS[preset]
+    types = types or df['type'].unique().tolist()
+    bounds = prep.year_range(df)
+    if bounds is None:
+        return types, None
+    min_year, max_year, default_start = bounds
+    return types, (default_start if years == 'default' else min_year, max_year)
+
+def render_preset(data_path, preset):
+    """
+    Run the overview and deep-dive sections headlessly for one preset (Streamlit calls are no-ops outside
+    a script run); the figures land in the figure cache under the preset's filter state.
+    Returns (state, types, years, kpis, {builder name: figure}, {builder name: JSON payload}).
+    """
+    # Sections are imported here: they pull in the plotting stack, which serving does not need
+    from sections import overview, deep_dives
+
+    df = store.load_prepared(data_path)
+    index = store.load_index(data_path)
+    base_cube = store.load_cube(data_path)
+
+    types, years = resolve(preset, df)
+    state = figcache.filter_state(store.catalog_version(data_path), types, years)
+    agg = cube.slice_cube(base_cube, types, years)
+    filtered = prep.filter_data(df, types, years, None, index=index, columns=deep_dives.COLUMNS)
+
+    overview.show(agg, state, lazy=False)
+    deep_dives.show(filtered, agg, state, lazy=False, data_path=data_path)
+    return state, types, years, aggregates.kpis(agg), figcache.figures_for(state), figcache.payloads_for(state)
+
+def export(data_path, out_dir, presets=None):
+    """
+    Render every chart of the overview and deep-dive sections for each preset and write them to out_dir.
+    Returns the manifest.
+    """
+    manifest = {'data': os.path.basename(data_path), 'version': store.catalog_version(data_path), 'presets': {}}
+    for preset in presets or PRESETS:
+        state, types, years, kpis, figures, payloads = render_preset(data_path, preset)
+
+        target = os.path.join(out_dir, preset)
+        os.makedirs(target, exist_ok=True)
+        for name, payload in payloads.items():
+            _write(os.path.join(target, f"{name}.json"), payload)
+        _write_report(os.path.join(target, 'report.html'), preset, kpis, figures)
+        _write(os.path.join(target, 'kpis.json'), json.dumps(kpis, indent=2))
+
+        manifest['presets'][preset] = {
+            'state': state,
+            'types': types,
+            'years': list(years) if years else None,
+            'kpis': kpis,
+            'charts': sorted(figures),
+        }
+
+    _write(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2))
+    return manifest
+
+def _write(path, text):
+    """Write a file through a temporary one, so a running app never reads it half written."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def _write_report(path, preset, kpis, figures):
+    import plotly.io as pio # Plotly is only imported once figures are read or written (see sections/registry.py)
+
+    parts = [f"<h1>Netflix Content Strategy Report: {preset}</h1>",
+             "<p>" + " &middot; ".join(f"<b>{k}</b>: {v:,}" for k, v in kpis.items()) + "</p>"]
+    for i, (name, fig) in enumerate(sorted(figures.items())):
+        parts.append(pio.to_html(fig, full_html=False, include_plotlyjs='cdn' if i == 0 else False))
+    _write(path, "<html><head><meta charset='utf-8'></head><body>" + "\n".join(parts) + "</body></html>")
+
+def _manifest(out_dir):
+    """The parsed manifest of an export directory, or None when it is missing or unreadable."""
+    path = os.path.join(out_dir, MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _LOCK:
+        cached = _MANIFESTS.get(out_dir)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    with _LOCK:
+        _MANIFESTS[out_dir] = (mtime, manifest)
+    return manifest
+
+def serve(out_dir, state):
+    """
+    If an exported preset matches the filter state, load its figures into the figure cache
+    (so sections pick them up instead of building them) and return the preset name; else None.
+    A chart whose file is missing or unreadable is skipped and rendered live.
+    """
+    manifest = _manifest(out_dir)
+    if not manifest:
+        return None
+    for preset, entry in manifest['presets'].items():
+        if entry['state'] != state:
+            continue
+        import plotly.io as pio
+
+        for name in entry['charts']:
+            if not figcache.contains(name, state):
+                try:
+                    with open(os.path.join(out_dir, preset, f"{name}.json")) as f:
+                        payload = f.read()
+                    fig = pio.from_json(payload)
+                except (OSError, ValueError):
+                    continue
+                figcache.seed(name, state, fig, payload)
+        return preset
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Export pre-rendered figures and KPIs for filter presets.")
+    parser.add_argument('--data', default='Ntitles.csv')
+    parser.add_argument('--out', default='exports')
+    parser.add_argument('--presets', nargs='+', choices=sorted(PRESETS))
+    args = parser.parse_args()
+
+    manifest = export(args.data, args.out, args.presets)
+    for preset, entry in manifest['presets'].items():
+        print(f"{preset}: {len(entry['charts'])} charts, {entry['kpis']['total']:,} titles")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from utils import perf, search
+
+# Default caps of the shared figure cache; change them with configure()
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+
+# chart key -> (figure, JSON payload); most recently used last. Shared by every session.
+# The payload is serialized once when the figure is cached: it sizes the entry and is what exports write.
+_FIGURES = OrderedDict()
+_LOCK = threading.Lock()
+_LIMITS = {'entries': MAX_ENTRIES, 'bytes': MAX_BYTES}
+STATS = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+def filter_state(version, selected_types=None, selected_years=None, selected_countries=None,
+                 selected_genres=None, selected_cast=None, selected_directors=None, query=None):
+    """
+    Canonical hash of a filter state: selection order does not matter, and the catalog version
+    (io.catalog_version) is part of it so figures of replaced or updated data are never served.
+    A search query counts by its distinct tokens, so case, punctuation and word order do not matter.
+    """
+    state = {
+        'data': version,
+        'types': sorted(selected_types or []),
+        'years': list(selected_years) if selected_years else None,
+        'countries': sorted(selected_countries or []),
+        'genres': sorted(selected_genres or []),
+        'cast': sorted(selected_cast or []),
+        'directors': sorted(selected_directors or []),
+    }
+    tokens = sorted(set(search.tokenize(query or '')))
+    if tokens: # only present when searching, so states without a query hash as before
+        state['query'] = tokens
+    return hashlib.blake2b(json.dumps(state, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+def figure(builder, data, state=None):
+    """
+    builder(data), memoized on (builder name, filter state) with LRU eviction.
+    With state=None the figure is built without caching.
+    `data` may be a zero-argument callable: it is then only evaluated when the figure has to be built,
+    for chart inputs that cost more to compute than the cached figure.
+    """
+    with perf.span(f"chart:{builder.__name__}") as timing:
+        if state is None:
+            timing['cached'] = False
+            return builder(data() if callable(data) else data)
+
+        key = (builder.__name__, state)
+        with _LOCK:
+            entry = _FIGURES.get(key)
+            if entry is not None:
+                _FIGURES.move_to_end(key)
+                STATS['hits'] += 1
+                timing.update(cached=True, bytes=len(entry[1]))
+                return entry[0]
+            STATS['misses'] += 1
+
+        # Built outside the lock so sessions missing on different charts do not wait on each other
+        fig = builder(data() if callable(data) else data)
+        payload = fig.to_json()
+        timing.update(cached=False, bytes=len(payload))
+        with _LOCK:
+            if key not in _FIGURES:
+                _FIGURES[key] = (fig, payload)
+                STATS['bytes'] += len(payload)
+                _evict()
+        return fig
+
+def figures_for(state):
+    """
+    {builder name: figure} of every cached figure built for a filter state.
+    """
+    with _LOCK:
+        return {name: fig for (name, key_state), (fig, _) in _FIGURES.items() if key_state == state}
+
+def payloads_for(state):
+    """
+    {builder name: JSON payload} of every cached figure built for a filter state.
+    """
+    with _LOCK:
+        return {name: payload for (name, key_state), (_, payload) in _FIGURES.items() if key_state == state}
+
+def contains(builder_name, state):
+    with _LOCK:
+        return (builder_name, state) in _FIGURES
+
+def seed(builder_name, state, fig, payload):
+    """
+    Put an already built figure (e.g. a pre-rendered export) into the cache, with its JSON payload.
+    """
+    with _LOCK:
+        if (builder_name, state) not in _FIGURES:
+            _FIGURES[(builder_name, state)] = (fig, payload)
+            STATS['bytes'] += len(payload)
+            _evict()
+
+def _evict():
+    while _FIGURES and (len(_FIGURES) > _LIMITS['entries'] or STATS['bytes'] > _LIMITS['bytes']):
+        _, (_, payload) = _FIGURES.popitem(last=False)
+        STATS['bytes'] -= len(payload)
+        STATS['evictions'] += 1
+
+def configure(max_entries=None, max_bytes=None):
+    """
+    Change the entry and serialized-size caps; evicts immediately if the cache is over them.
+    """
+    with _LOCK:
+        if max_entries is not None:
+            _LIMITS['entries'] = max_entries
+        if max_bytes is not None:
+            _LIMITS['bytes'] = max_bytes
+        _evict()
+
+def cache_info():
+    """
+    Counters, current size and caps of the figure cache.
+    """
+    with _LOCK:
+        return dict(STATS, entries=len(_FIGURES), max_entries=_LIMITS['entries'], max_bytes=_LIMITS['bytes'])
+
+def clear_cache():
+    """
+    Drop every cached figure and reset the counters.
+    """
+    with _LOCK:
+        _FIGURES.clear()
+        for k in STATS:
+            STATS[k] = 0
@@ -1,19 +1,43 @@
 import streamlit as st
 import pandas as pd
-import os
 
-@st.cache_data
+from utils import store
+# Everything but the two loaders below is the Streamlit-free core's own (see utils/store.py)
+from utils.store import (
+    TEXT_COLUMNS, RAW_DTYPES, SNAPSHOT_KEY, DERIVED_FILES, CACHE_STATS,
+    file_fingerprint, load_text, load_index, load_cube, load_talent, load_search,
+    load_similar, catalog_version, ingest_delta, cache_info, clear_cache,
+    derived_path, build_snapshot, load_snapshot,
+)
+
+def _report(error):
+    """Show a load error in the app; the page then sees an empty frame."""
+    if isinstance(error, FileNotFoundError):
+        st.error(str(error))
+    else:
+        st.error(f"Error loading data: {error}")
+    return pd.DataFrame()
+
 def load_data(filepath):
     """
-    Load CSV data with caching.
+    Load CSV data with caching (see store.load_data); errors are shown in the app.
+    """
+    try:
+        return store.load_data(filepath)
+    except Exception as e:
+        return _report(e)
+
+def load_prepared(filepath, use_snapshot=True, chunksize=None, workers=None):
+    """
+    Load and clean the catalog, cached across sessions (see store.load_prepared); errors are shown in the app.
     """
-    if not os.path.exists(filepath):
-        st.error(f"File not found: {filepath}. Please upload 'Ntitles.csv' to the root directory.")
-        return pd.DataFrame()
-    
     try:
-        df = pd.read_csv(filepath)
-        return df
+        return store.load_prepared(filepath, use_snapshot=use_snapshot, chunksize=chunksize, workers=workers)
     except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return _report(e)
+
+if __name__ == "__main__":
+    # Build step, kept under its old name: python -m utils.io [Ntitles.csv] (same as python -m utils.store)
+    import sys
+    source = sys.argv[1] if len(sys.argv) > 1 else 'Ntitles.csv'
+    print(f"Snapshot written to {build_snapshot(source)}")
@@ -0,0 +1,81 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Streamlit runs every session's script on its own thread, so the current rerun's record is thread-local
+_local = threading.local()
+_FILE_LOCK = threading.Lock()
+
+def start_run(**context):
+    """
+    Begin recording a rerun; context (page, session...) is stored with the record.
+    """
+    _local.run = {'context': context, 'started': time.time(), 'spans': []}
+    _local.depth = 0
+    _local.t0 = time.perf_counter()
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+@contextmanager
+def span(name, **fields):
+    """
+    Time a block of the current rerun. Yields the span's dict so callers can attach fields
+    (row counts, payload bytes...). Does nothing but time when no rerun is being recorded.
+    """
+    entry = dict(fields, name=name)
+    run = current_run()
+    if run is None:
+        yield entry
+        return
+
+    entry['depth'] = _local.depth
+    run['spans'].append(entry)
+    _local.depth += 1
+    start = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        entry['ms'] = (time.perf_counter() - start) * 1000
+        _local.depth -= 1
+
+def finish_run(metrics_file=None):
+    """
+    Close the current rerun's record, log a one-line summary and append it to metrics_file (JSON lines).
+    Returns the record.
+    """
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    run['total_ms'] = (time.perf_counter() - _local.t0) * 1000
+
+    top = ', '.join(f"{s['name']}={s['ms']:.0f}ms" for s in run['spans'] if s['depth'] == 0)
+    logger.info("rerun %s %.0fms: %s", run['context'], run['total_ms'], top)
+    if metrics_file:
+        with _FILE_LOCK, open(metrics_file, 'a') as f:
+            f.write(json.dumps(run, default=str) + '\n')
+    return run
+
+def show_panel(run):
+    """
+    Sidebar breakdown of a finished rerun: one row per span, nested spans indented.
+    """
+    if not run:
+        return
+    import streamlit as st # only the panel needs Streamlit; spans are also recorded by headless jobs
+    with st.sidebar.expander(f"⏱️ Rerun: {run['total_ms']:.0f} ms", expanded=False):
+        rows = [
+            dict({k: v for k, v in s.items() if k not in ('name', 'depth', 'ms')},
+                 stage=' ' * s['depth'] + s['name'], ms=round(s['ms'], 1))
+            for s in run['spans']
+        ]
+        table = pd.DataFrame(rows)
+        st.dataframe(table[['stage', 'ms'] + [c for c in table.columns if c not in ('stage', 'ms')]],
+                     hide_index=True, use_container_width=True)
@@ -1,9 +1,80 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
+# Bumped whenever clean_data's output schema changes; persisted snapshots of older versions are rebuilt
+SCHEMA_VERSION = 2
+
+# Known date_added formats, tried in order before pandas' slow per-value inference
+DATE_FORMATS = ['%B %d, %Y', '%b %d, %Y', '%Y-%m-%d', '%d-%b-%y', '%m/%d/%Y']
+# Strings that mean "no date" and are not parsed at all
+NULL_DATES = ['', 'nan', 'NaN', 'NaT', 'None']
+# Values parsed by parse_dates: total, distinct, and distinct strings that needed the slow path.
+# clean_data_parallel adds up its blocks' counts, so strings repeated across blocks count once per block.
+DATE_STATS = {'values': 0, 'unique': 0, 'slow_path': 0}
+
+# Below this many rows clean_data_parallel stays serial
+PARALLEL_MIN_ROWS = 200_000
+
+# Low-cardinality text columns stored as categoricals (one code per row instead of one string)
+CATEGORICAL_COLUMNS = ['type', 'rating', 'country', 'primary_country', 'primary_genre', 'added_month']
+
+# Compact nullable integer dtypes for the numeric features
+INTEGER_DTYPES = {
+    'release_year': 'Int16',
+    'added_year': 'Int16',
+    'added_month_num': 'Int8',
+    'added_day': 'Int8',
+    'duration_min': 'Int16',
+    'seasons': 'Int8',
+}
+
+def parse_dates(values, formats=DATE_FORMATS):
+    """
+    Parse date strings into date_added_dt and its added_year/added_month/added_month_num/added_day features.
+    Every distinct string is parsed once: the known formats are tried in order and only strings none of them
+    match fall through to pandas' per-value inference (counted in DATE_STATS['slow_path']).
+    Unparseable strings give NaT/NA.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+
+    pending = ~uniques.isin(NULL_DATES) & uniques.notna()
+    parts = []
+    for fmt in formats:
+        if not pending.any():
+            break
+        hits = pd.to_datetime(uniques[pending], format=fmt, errors='coerce').dropna()
+        parts.append(hits)
+        pending[hits.index] = False
+
+    slow = int(pending.sum())
+    if slow:
+        parts.append(pd.to_datetime(uniques[pending], format='mixed', errors='coerce'))
+
+    DATE_STATS['values'] += len(values)
+    DATE_STATS['unique'] += len(uniques)
+    DATE_STATS['slow_path'] += slow
+
+    parsed = pd.concat(parts) if parts else pd.Series(dtype='datetime64[ns]')
+    parsed = pd.to_datetime(parsed.reindex(uniques.index))
+    features = {
+        'date_added_dt': parsed.array,
+        'added_year': parsed.dt.year.astype(INTEGER_DTYPES['added_year']).array,
+        'added_month': pd.Categorical(parsed.dt.month_name()),
+        'added_month_num': parsed.dt.month.astype(INTEGER_DTYPES['added_month_num']).array,
+        'added_day': parsed.dt.day.astype(INTEGER_DTYPES['added_day']).array,
+    }
+    # Map back to rows; factorize codes missing values as -1, which take fills with NaT/NA
+    return pd.DataFrame({name: arr.take(codes, allow_fill=True) for name, arr in features.items()},
+                        index=values.index)
+
 def clean_data(df):
     """
     Performs data cleaning, standardization, and feature engineering.
+    All transforms are vectorized; text features end up as categoricals and numbers as compact nullable ints.
     """
     if df.empty:
         return df
@@ -12,69 +83,273 @@ def clean_data(df):
     
     # 1. Handle Missing Values
     # Fill categorical missing values
-    df['director'] = df['director'].fillna('Unknown')
-    df['cast'] = df['cast'].fillna('Unknown')
-    df['country'] = df['country'].fillna('Unknown')
-    df['rating'] = df['rating'].fillna('Unknown')
+    # (columns left out of a projected load are skipped)
+    for col in ['director', 'cast', 'country', 'rating']:
+        if col in df.columns:
+            df[col] = df[col].fillna('Unknown')
     
     # 2. Handle Dates
-    # Coerce errors to handle dirty date formats
+    # Each distinct string is parsed once (known formats first) and the features are mapped back to rows
     df['date_added'] = df['date_added'].astype(str).str.strip()
-    df['date_added_dt'] = pd.to_datetime(df['date_added'], errors='coerce')
-    
-    # Extract temporal features
-    df['added_year'] = df['date_added_dt'].dt.year
-    df['added_month'] = df['date_added_dt'].dt.month_name()
-    df['added_month_num'] = df['date_added_dt'].dt.month
-    df['added_day'] = df['date_added_dt'].dt.day
+    df = df.join(parse_dates(df['date_added']))
     
     # 3. Handle Duration
     if 'duration' in df.columns:
-        temp_duration = df['duration'].astype(str)
-        # Extract minutes for movies (e.g., "90 min")
-        df['duration_min'] = temp_duration.str.extract(r'(\d+)\s*min')[0].astype(float)
-        # Extract season count for TV Shows (e.g., "2 Seasons")
-        df['seasons'] = temp_duration.str.extract(r'(\d+)\s*Season')[0].astype(float)
+        # One pass extracts the number and its unit: "90 min" for movies, "2 Seasons" for TV Shows
+        parts = df['duration'].astype(str).str.extract(r'(\d+)\s*(min|Season)')
+        value = pd.to_numeric(parts[0])
+        df['duration_min'] = value.where(parts[1] == 'min')
+        df['seasons'] = value.where(parts[1] == 'Season')
     else:
         df['duration_min'] = np.nan
         df['seasons'] = np.nan
     
     # 4. Handle Countries
     # Many titles have multiple countries; we take the first one as "Primary Country"
-    if 'country' in df.columns:
-        df['primary_country'] = df['country'].apply(
-            lambda x: x.split(',')[0].strip() if isinstance(x, str) and x else 'Unknown'
-        )
-    else:
-        df['primary_country'] = 'Unknown'
+    df['primary_country'] = df['country'].str.split(',', n=1).str[0].str.strip()
+
+    # 5. Genres: the first listed genre as a column; the full multi-valued list comes from explode_genres
+    df['primary_genre'] = df['listed_in'].astype(str).str.split(',', n=1).str[0]
 
-    # 5. Split Genres (create a list for analysis later)
-    df['genre_list'] = df['listed_in'].astype(str).str.split(', ')
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype('category')
+    for col, dtype in INTEGER_DTYPES.items():
+        df[col] = df[col].astype(dtype)
 
     return df
 
-def filter_data(df, selected_types, selected_years, selected_countries):
+def explode_genres(df):
     """
-    Filters the dataframe based on sidebar inputs.
+    One row per (title, genre) pair, indexed by the title's index label.
     """
-    temp_df = df.copy()
-    
+    return df['listed_in'].astype(str).str.split(', ').explode().astype('category')
+
+# Multi-valued columns covered by the inverted index: field -> (column, separator)
+INDEX_FIELDS = {
+    'country': ('country', ','),
+    'genre': ('listed_in', ','),
+    'cast': ('cast', ','),
+    'director': ('director', ','),
+}
+
+def build_index(df, fields=None, positions=None):
+    """
+    Inverted index over the multi-valued columns: {field: {value: sorted int32 row positions}}.
+    'Unknown' fillers and empty entries are not indexed.
+    `positions` gives the catalog position of each row of df when df is only part of the catalog.
+    """
+    index = {}
+    for field in fields or INDEX_FIELDS:
+        column, sep = INDEX_FIELDS[field]
+        if column not in df.columns:
+            continue
+        values = df[column].astype(str).reset_index(drop=True).str.split(sep).explode().str.strip()
+        values = values[(values != '') & (values != 'Unknown')]
+
+        # Group row positions by value: sort once by value code, then cut at the group boundaries
+        codes, uniques = pd.factorize(values, sort=True)
+        rows = values.index.to_numpy(dtype=np.int32)
+        if positions is not None:
+            rows = np.asarray(positions, dtype=np.int32)[rows]
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        # A title listing the same value twice is kept once
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        index[field] = dict(zip(uniques, np.split(rows, bounds)))
+    return index
+
+def merge_indexes(parts):
+    """
+    Combine indexes built over consecutive row blocks (positions of later parts are higher).
+    """
+    merged = {}
+    for part in parts:
+        for field, postings in part.items():
+            target = merged.setdefault(field, {})
+            for value, rows in postings.items():
+                target.setdefault(value, []).append(rows)
+    return {field: {value: np.concatenate(rows) if len(rows) > 1 else rows[0] for value, rows in postings.items()}
+            for field, postings in merged.items()}
+
+def concat_prepared(frames, ignore_index=True):
+    """
+    Concatenate cleaned frames, unioning the categories of categorical columns instead of falling back to object.
+    Categories come out sorted, as clean_data produces them for a single frame.
+    """
+    df = pd.concat(frames, ignore_index=ignore_index)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            union = pd.api.types.union_categoricals([f[col] for f in frames], sort_categories=True)
+            df[col] = pd.Series(union, index=df.index)
+    return df
+
+def _clean_block(df):
+    """
+    clean_data in a worker process, with the DATE_STATS counts it added (the worker's globals stay there).
+    """
+    before = dict(DATE_STATS)
+    cleaned = clean_data(df)
+    return cleaned, {key: DATE_STATS[key] - before[key] for key in DATE_STATS}
+
+def clean_data_parallel(df, workers=None, min_rows=PARALLEL_MIN_ROWS):
+    """
+    clean_data on a process pool: the frame is split into one contiguous block per worker and the
+    cleaned blocks are reassembled in order, giving the same frame as the serial run.
+    The blocks' DATE_STATS counts are added to this process's.
+    Frames smaller than min_rows are cleaned serially, where pool start-up would cost more than it saves.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(df) < min_rows:
+        return clean_data(df)
+
+    bounds = np.linspace(0, len(df), workers + 1, dtype=int)
+    blocks = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_clean_block, blocks))
+    for _, counts in results:
+        for key, count in counts.items():
+            DATE_STATS[key] += count
+    return concat_prepared([cleaned for cleaned, _ in results], ignore_index=False)
+
+def update_index(index, old_rows, old_positions, new_rows, new_positions):
+    """
+    Index after the rows at old_positions were replaced and new_rows written at new_positions.
+    Only the postings of values appearing in those rows are touched; the input index is not modified.
+    A field whose column old_rows lack (a streamed catalog keeps no cast) has old_positions removed
+    from every posting that holds them instead.
+    """
+    removed = build_index(old_rows, index, positions=old_positions)
+    added = build_index(new_rows, index, positions=new_positions)
+    updated = {}
+    for field, postings in index.items():
+        postings = dict(postings)
+        if field not in removed:
+            removed[field] = _postings_holding(postings, old_positions)
+        for value, rows in removed[field].items():
+            remaining = np.setdiff1d(postings[value], rows, assume_unique=True)
+            if len(remaining):
+                postings[value] = remaining
+            else:
+                del postings[value]
+        for value, rows in added[field].items():
+            postings[value] = np.union1d(postings[value], rows) if value in postings else rows
+        updated[field] = postings
+    return updated
+
+def _postings_holding(postings, positions):
+    """
+    {value: positions it holds} for the values of one index field whose postings contain any of `positions`.
+    """
+    positions = np.asarray(positions, dtype=np.int32)
+    if not len(positions) or not postings:
+        return {}
+    values = list(postings)
+    rows = np.concatenate([postings[v] for v in values])
+    owners = np.repeat(np.arange(len(values)), [len(postings[v]) for v in values])
+    hit = np.isin(rows, positions)
+    found = {}
+    for owner, row in zip(owners[hit], rows[hit]):
+        found.setdefault(values[owner], []).append(row)
+    return {value: np.array(rows, dtype=np.int32) for value, rows in found.items()}
+
+def align_categories(base, delta):
+    """
+    Give the categorical columns of two cleaned frames the same categories, so they can be combined
+    without falling back to object dtype. New categories are appended, so base keeps its codes.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in base.columns and col in delta.columns:
+            extra = delta[col].cat.categories.difference(base[col].cat.categories)
+            if len(extra):
+                base = base.assign(**{col: base[col].cat.add_categories(extra)})
+            delta = delta.assign(**{col: delta[col].cat.set_categories(base[col].cat.categories)})
+    return base, delta
+
+def lookup(index, field, values):
+    """
+    Sorted row positions of titles matching ANY of the values in one field.
+    """
+    postings = [index[field].get(v) for v in values]
+    postings = [p for p in postings if p is not None]
+    if not postings:
+        return np.empty(0, dtype=np.int32)
+    return np.unique(np.concatenate(postings))
+
+def year_range(df, default_from=2015):
+    """
+    (min_year, max_year, default_start) of the added years, as the sidebar slider uses them;
+    default_start is default_from unless the data starts later. None when no title has a date.
+    """
+    valid_years = df['added_year'].dropna()
+    if valid_years.empty:
+        return None
+    min_year = int(valid_years.min())
+    max_year = int(valid_years.max())
+    default_start = default_from if default_from > min_year else min_year
+    return min_year, max_year, default_start
+
+def filter_positions(df, selected_types, selected_years, selected_countries,
+                     selected_genres=None, selected_cast=None, selected_directors=None, index=None,
+                     selected_rows=None):
+    """
+    Row positions of the titles matching the sidebar inputs, as one sorted int array.
+    Returns None when no filter is active (every row matches).
+    Multi-valued filters (country, genre, cast, director) are answered from the inverted index:
+    values within a field are OR-ed, fields are AND-ed.
+    `selected_rows` (sorted row positions, e.g. search.matches) restricts the result further.
+    """
+    mask = None
+
     # Filter by Type
     if selected_types:
-        temp_df = temp_df[temp_df['type'].isin(selected_types)]
-        
-    # Filter by Year
-    if selected_years and 'added_year' in temp_df.columns:
+        mask = df['type'].isin(selected_types).to_numpy()
+
+    # Filter by Year (titles without a parsed date never match a range)
+    if selected_years and 'added_year' in df.columns:
         min_year, max_year = selected_years
-        temp_df = temp_df[
-            (temp_df['added_year'] >= min_year) & 
-            (temp_df['added_year'] <= max_year)
-        ]
-        
-    # Filter by Country
-    if selected_countries:
-        # Check if the row's country string contains ANY of the selected countries
-        mask = temp_df['country'].apply(lambda x: any(c in x for c in selected_countries) if isinstance(x, str) else False)
-        temp_df = temp_df[mask]
-        
-    return temp_df
\ No newline at end of file
+        years = df['added_year']
+        in_range = ((years >= min_year) & (years <= max_year)).to_numpy(dtype=bool, na_value=False)
+        mask = in_range if mask is None else mask & in_range
+
+    positions = None if mask is None else np.flatnonzero(mask)
+
+    selections = {
+        'country': selected_countries,
+        'genre': selected_genres,
+        'cast': selected_cast,
+        'director': selected_directors,
+    }
+    selections = {field: values for field, values in selections.items() if values}
+    if selections:
+        if index is None:
+            index = build_index(df, selections)
+        for field, values in selections.items():
+            matched = lookup(index, field, values)
+            positions = matched if positions is None else np.intersect1d(positions, matched, assume_unique=True)
+
+    if selected_rows is not None:
+        selected_rows = np.asarray(selected_rows)
+        positions = selected_rows if positions is None else np.intersect1d(positions, selected_rows, assume_unique=True)
+
+    return positions
+
+def filter_data(df, selected_types, selected_years, selected_countries,
+                selected_genres=None, selected_cast=None, selected_directors=None, index=None, columns=None,
+                selected_rows=None):
+    """
+    Filters the dataframe based on sidebar inputs.
+    All criteria are combined into one set of row positions and the rows are taken once;
+    `columns` restricts the result to the columns the calling page needs.
+    With no active filter the base frame (or a column projection of it) is returned without copying.
+    """
+    positions = filter_positions(df, selected_types, selected_years, selected_countries,
+                                 selected_genres, selected_cast, selected_directors, index, selected_rows)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    if positions is None:
+        return df
+    return df.iloc[positions]
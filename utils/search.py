@@ -0,0 +1,297 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils import csr
+
+# Searched columns and the weight of a query term found in each (a title hit outranks a description hit)
+FIELDS = {'title': 3.0, 'director': 2.0, 'cast': 1.5, 'description': 1.0}
+# Query terms shorter than this only match whole tokens; longer ones also match as prefixes
+MIN_PREFIX = 2
+# Score factor of a prefix match relative to an exact token match
+PREFIX_WEIGHT = 0.6
+# Tokens longer than this are not indexed (ids, URLs and other noise nobody types)
+MAX_TOKEN = 32
+# Rows tokenized at a time when building over a large frame
+BLOCK_ROWS = 100_000
+
+TOKEN_PATTERN = r'\w+'
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+def tokenize(text):
+    """
+    Lower-cased word tokens of a query string, in the same way the index tokenizes the catalog.
+    """
+    return _TOKEN_RE.findall(str(text).lower())
+
+def _postings(df, positions=None):
+    """
+    (term, row, weight) triples of df, one per term and title, weights summed over the fields it appears in.
+    """
+    parts = []
+    for column, weight in FIELDS.items():
+        if column not in df.columns:
+            continue
+        # 'Unknown' fillers of missing cast/director are not searchable
+        text = df[column].astype(object).where(df[column].notna() & (df[column] != 'Unknown'), '')
+        tokens = text.astype(str).str.lower().str.findall(TOKEN_PATTERN).reset_index(drop=True).explode()
+        tokens = tokens[tokens.notna() & (tokens.str.len() <= MAX_TOKEN)]
+        part = pd.DataFrame({'term': tokens.to_numpy(dtype=object), 'row': tokens.index.to_numpy(dtype=np.int64)})
+        part = part.drop_duplicates()
+        part['weight'] = np.float32(weight)
+        parts.append(part)
+
+    if not parts:
+        return pd.DataFrame({'term': [], 'row': [], 'weight': []})
+    postings = pd.concat(parts, ignore_index=True)
+    if positions is not None:
+        postings['row'] = np.asarray(positions, dtype=np.int64)[postings['row'].to_numpy()]
+    return postings
+
+def _assemble(postings, n_rows):
+    """
+    Lay the triples out as sorted terms with one contiguous run of (row, weight) postings per term,
+    sorted by row within the run. Terms sharing a prefix are adjacent, so do their postings.
+    """
+    codes, terms = pd.factorize(postings['term'].to_numpy(dtype=object), sort=True)
+    rows = postings['row'].to_numpy(dtype=np.int64)
+    key = codes.astype(np.int64) * max(n_rows, 1) + rows
+    keys, inverse = np.unique(key, return_inverse=True)
+    weights = np.bincount(inverse.ravel(), weights=postings['weight'].to_numpy(), minlength=len(keys))
+
+    return {
+        'terms': np.asarray(terms, dtype=object),
+        'offsets': csr.pointers(keys // max(n_rows, 1), len(terms)),
+        'rows': (keys % max(n_rows, 1)).astype(np.int32),
+        'weights': weights.astype(np.float32),
+        'n_rows': int(n_rows),
+    }
+
+def build_search(df, positions=None, n_rows=None):
+    """
+    Inverted token index over FIELDS: sorted terms, per-term offsets into row/weight postings.
+    `positions` gives the catalog position of each row of df when df is only part of the catalog.
+    Large frames are tokenized BLOCK_ROWS rows at a time, so the exploded tokens never exist all at once.
+    """
+    if positions is None:
+        positions = np.arange(len(df))
+    if n_rows is None:
+        n_rows = int(np.max(positions, initial=-1)) + 1
+    if len(df) <= BLOCK_ROWS:
+        return _assemble(_postings(df, positions), n_rows)
+
+    parts = [_assemble(_postings(df.iloc[start:start + BLOCK_ROWS], positions[start:start + BLOCK_ROWS]), n_rows)
+             for start in range(0, len(df), BLOCK_ROWS)]
+    return merge_searches(parts)
+
+def _triples(index):
+    """
+    The postings of an index back as a (term, row, weight) frame.
+    """
+    counts = np.diff(index['offsets'])
+    return pd.DataFrame({
+        'term': np.repeat(index['terms'], counts),
+        'row': index['rows'].astype(np.int64),
+        'weight': index['weights'],
+    })
+
+def merge_searches(parts):
+    """
+    Combine search indexes built over consecutive row blocks (positions of later parts are higher).
+    Postings are regrouped by a stable sort on the global term id, which keeps them sorted by row.
+    """
+    n_rows = max((part['n_rows'] for part in parts), default=0)
+    if len(parts) == 1:
+        return parts[0]
+
+    codes, terms = pd.factorize(np.concatenate([part['terms'] for part in parts]), sort=True)
+    bounds = np.cumsum([len(part['terms']) for part in parts])[:-1]
+    term_ids = np.concatenate([np.repeat(part_codes.astype(np.int32), np.diff(part['offsets']))
+                               for part, part_codes in zip(parts, np.split(codes, bounds))])
+    order = np.argsort(term_ids, kind='stable')
+    return {
+        'terms': np.asarray(terms, dtype=object),
+        'offsets': csr.pointers(term_ids, len(terms)),
+        'rows': np.concatenate([part['rows'] for part in parts])[order],
+        'weights': np.concatenate([part['weights'] for part in parts])[order],
+        'n_rows': int(n_rows),
+    }
+
+def update_search(index, old_rows, old_positions, new_rows, new_positions):
+    """
+    Search index after the rows at old_positions were replaced and new_rows written at new_positions.
+    Only the runs of the terms these rows touch are rebuilt; the runs in between are copied over as whole
+    slices, so the catalog is never re-tokenized or re-sorted and the work follows the size of the delta.
+    The input index is not modified.
+    """
+    terms, offsets, rows = index['terms'], index['offsets'], index['rows']
+    old_positions = np.asarray(old_positions, dtype=np.int64)
+    n_rows = max(index['n_rows'], int(np.max(new_positions, initial=-1)) + 1)
+
+    # Touched terms: those of the new rows, and those holding the replaced rows, found from the rows' text
+    # when they carry it (a streamed frame has no cast or description) or else by a scan of the postings
+    added = _postings(new_rows, new_positions)
+    replaced = np.zeros(n_rows, dtype=bool)
+    replaced[old_positions] = True
+    if all(column in old_rows.columns for column in FIELDS):
+        touched = _term_ids(terms, np.concatenate([pd.unique(_postings(old_rows)['term']), pd.unique(added['term'])]))
+    else:
+        holding = np.searchsorted(offsets, np.flatnonzero(replaced[rows]), side='right') - 1
+        touched = np.union1d(holding, _term_ids(terms, pd.unique(added['term'])))
+
+    # The touched terms' remaining postings plus the new rows' postings, as a small index of their own.
+    # Both sides are sorted by (term, row), so the new postings are inserted rather than sorted in.
+    new = _assemble(added, n_rows)
+    patch_terms = np.union1d(terms[touched], new['terms']).astype(object)
+    spans = csr.spans(offsets, touched)
+    kept = ~replaced[rows[spans]]
+    old_keys = (np.repeat(np.searchsorted(patch_terms, terms[touched]), np.diff(offsets)[touched]) * n_rows
+                + rows[spans])[kept]
+    new_keys = np.repeat(np.searchsorted(patch_terms, new['terms']), np.diff(new['offsets'])) * n_rows + new['rows']
+    at = np.searchsorted(old_keys, new_keys)
+    keys = np.insert(old_keys, at, new_keys)
+    weights = np.insert(index['weights'][spans][kept], at, new['weights'])
+    sizes = np.bincount(keys // n_rows, minlength=len(patch_terms))
+    present = sizes > 0 # terms left without postings are dropped
+    patch = {
+        'terms': patch_terms[present],
+        'offsets': np.concatenate([[0], np.cumsum(sizes[present])]).astype(np.int64),
+        'rows': (keys % n_rows).astype(np.int32),
+        'weights': weights.astype(np.float32),
+    }
+
+    # Splice: untouched runs of the index in order, with the patch's runs inserted where their terms sort
+    at = np.searchsorted(terms, patch['terms'])
+    dropped = np.zeros(len(terms) + 1, dtype=bool)
+    dropped[touched] = True
+    pieces, cursor, done = [], 0, 0
+    for position in np.union1d(touched, at):
+        pieces.append((index, cursor, position))
+        upto = np.searchsorted(at, position, side='right')
+        pieces.append((patch, done, upto))
+        cursor, done = position + dropped[position], upto
+    pieces.append((index, cursor, len(terms)))
+    pieces = [(part, lo, hi) for part, lo, hi in pieces if hi > lo]
+
+    sizes = [np.diff(part['offsets'][lo:hi + 1]) for part, lo, hi in pieces]
+    offsets = np.zeros(sum(len(size) for size in sizes) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(sizes) if sizes else [], out=offsets[1:])
+    return {
+        'terms': np.concatenate([np.empty(0, dtype=object)] + [part['terms'][lo:hi] for part, lo, hi in pieces]),
+        'offsets': offsets,
+        'rows': np.concatenate([np.empty(0, dtype=np.int32)]
+                               + [part['rows'][part['offsets'][lo]:part['offsets'][hi]] for part, lo, hi in pieces]),
+        'weights': np.concatenate([np.empty(0, dtype=np.float32)]
+                                  + [part['weights'][part['offsets'][lo]:part['offsets'][hi]] for part, lo, hi in pieces]),
+        'n_rows': int(n_rows),
+    }
+
+def _term_ids(terms, values):
+    """Sorted unique positions in `terms` of the values present there."""
+    if not len(terms) or not len(values):
+        return np.empty(0, dtype=np.int64)
+    found = np.minimum(np.searchsorted(terms, values), len(terms) - 1)
+    return np.unique(found[terms[found] == values])
+
+def _term_range(index, token):
+    """
+    [lo, hi) range of the terms a query token matches, and whether terms[lo] is the token itself.
+    """
+    terms = index['terms']
+    lo = np.searchsorted(terms, token, side='left')
+    exact = bool(lo < len(terms) and terms[lo] == token)
+    hi = np.searchsorted(terms, token + '\U0010ffff', side='left') if len(token) >= MIN_PREFIX else lo + exact
+    return lo, max(hi, lo), exact
+
+def _term_matches(index, lo, hi, exact):
+    """
+    (rows, scores) of one query token's term range, rows sorted and unique.
+    The exact token scores its field weight x idf; longer terms it prefixes score PREFIX_WEIGHT of that.
+    """
+    offsets = index['offsets']
+    if hi <= lo:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    # One idf for everything the token matches, so a rare completion does not outrank the exact word
+    counts = np.diff(offsets[lo:hi + 1])
+    idf = np.float32(np.log1p(index['n_rows'] / max(offsets[hi] - offsets[lo], 1)))
+    factor = np.full(hi - lo, PREFIX_WEIGHT * idf, dtype=np.float32)
+    if exact:
+        factor[0] = idf
+    rows = index['rows'][offsets[lo]:offsets[hi]]
+    scores = index['weights'][offsets[lo]:offsets[hi]] * np.repeat(factor, counts)
+    if hi - lo == 1:
+        return rows, scores
+
+    # Several terms share the prefix: keep each title's best-scoring term
+    if len(rows) > index['n_rows'] // 8:
+        # Broad prefix: scatter into a dense per-title array instead of sorting the postings
+        best = np.zeros(index['n_rows'], dtype=np.float32)
+        np.maximum.at(best, rows, scores)
+        rows = np.flatnonzero(best).astype(np.int32)
+        return rows, best[rows]
+    order = np.argsort(rows, kind='stable')
+    rows, scores = rows[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    return rows[starts], np.maximum.reduceat(scores, starts)
+
+def _match(index, tokens, within=None):
+    """
+    (rows, scores) of the titles matching every token, rows sorted, scores summed over the tokens.
+    """
+    # Intersect from the most selective token so the candidate set shrinks early; the posting counts
+    # come from the offsets, so a token without matches ends the query before any postings are read
+    offsets = index['offsets']
+    ranges = sorted((_term_range(index, token) for token in tokens), key=lambda r: offsets[r[1]] - offsets[r[0]])
+    if any(hi <= lo for lo, hi, _ in ranges):
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    rows, scores = _term_matches(index, *ranges[0])
+    if within is not None:
+        keep = np.isin(rows, within, assume_unique=True)
+        rows, scores = rows[keep], scores[keep]
+    for term_range in ranges[1:]:
+        if not len(rows):
+            break
+        other_rows, other_scores = _term_matches(index, *term_range)
+        if len(other_rows) > index['n_rows'] // 8:
+            # Common token: look the candidates up in a dense per-title array
+            dense = np.zeros(index['n_rows'], dtype=np.float32)
+            dense[other_rows] = other_scores
+            other = dense[rows]
+            keep = other > 0
+            rows, scores = rows[keep], scores[keep] + other[keep]
+        else:
+            found = np.minimum(np.searchsorted(other_rows, rows), len(other_rows) - 1)
+            keep = other_rows[found] == rows
+            rows, scores = rows[keep], scores[keep] + other_scores[found[keep]]
+    return rows, scores
+
+def search(index, text, within=None, limit=None):
+    """
+    Titles matching every token of a query, as (row positions, scores) ranked by descending score.
+    Each token matches as a whole word or, from MIN_PREFIX characters, as a word prefix.
+    `within` (sorted row positions, e.g. from prep.filter_positions) restricts the matches.
+    """
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens or index is None:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    rows, scores = _match(index, tokens, within)
+
+    # Top `limit` first (linear), then rank only those by score, ties in catalog order
+    if limit is not None and limit < len(rows):
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        rows, scores = rows[top], scores[top]
+    order = np.lexsort((rows, -scores))
+    return rows[order], scores[order]
+
+def matches(index, text):
+    """
+    Sorted row positions of every title matching a query, for combining with filter criteria.
+    Returns None for an empty query (no restriction).
+    """
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens:
+        return None
+    return _match(index, tokens)[0]
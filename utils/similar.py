@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+from utils import prep, search, csr
+
+# Weight of a genre feature relative to a description term of the same idf
+GENRE_WEIGHT = 2.0
+# Description terms in fewer titles than this cannot relate two titles; terms in more than
+# MAX_DF of the catalog are stop words. Neither is kept as a feature.
+MIN_DF = 2
+MAX_DF = 0.1
+# Rows tokenized at a time while building, and rows scored at a time by the blocked top-k passes
+BLOCK_ROWS = 100_000
+# Largest (queries x titles) score matrix a batched query materializes at once
+MAX_BATCH_CELLS = 4_000_000
+
+def _features(df, positions):
+    """
+    (rows, block-local feature codes, term counts) of a block of titles, with the block's feature names.
+    Description terms are plain tokens; genres are 'genre:<name>'.
+    """
+    names, rows, counts = [], [], []
+    if 'description' in df.columns:
+        tokens = df['description'].astype(object).where(df['description'].notna(), '').astype(str)
+        tokens = tokens.str.lower().str.findall(search.TOKEN_PATTERN).reset_index(drop=True).explode()
+        tokens = tokens[tokens.notna() & (tokens.str.len() <= search.MAX_TOKEN)]
+        names.append(tokens.to_numpy(dtype=object))
+        rows.append(tokens.index.to_numpy(dtype=np.int64))
+    if 'listed_in' in df.columns:
+        genres = prep.explode_genres(df.reset_index(drop=True)).astype(str).str.strip()
+        genres = genres[(genres != '') & (genres != 'nan') & (genres != 'Unknown')]
+        names.append(('genre:' + genres).to_numpy(dtype=object))
+        rows.append(genres.index.to_numpy(dtype=np.int64))
+
+    pairs = pd.DataFrame({'row': np.concatenate(rows) if rows else np.empty(0, dtype=np.int64),
+                          'name': np.concatenate(names) if names else np.empty(0, dtype=object)})
+    pairs = pairs.groupby(['row', 'name'], sort=False).size().reset_index(name='count')
+    codes, uniques = pd.factorize(pairs['name'])
+    rows = np.asarray(positions, dtype=np.int32)[pairs['row'].to_numpy()]
+    return rows, codes.astype(np.int32), pairs['count'].to_numpy(dtype=np.float32), np.asarray(uniques, dtype=object)
+
+def build_model(df, blocks=None):
+    """
+    TF-IDF feature matrix of the catalog over description terms and genres, rows L2-normalized.
+    Stored twice, as numpy CSR/CSC arrays: by title ('indptr', 'features', 'values') to read a title's
+    vector, and by feature ('col_ptr', 'col_rows', 'col_values') to score every title sharing its features.
+    `blocks` yields (frame, row positions) to featurize instead of BLOCK_ROWS slices of df, e.g. the
+    descriptions of a streamed catalog read back chunk by chunk; each position must appear once.
+    """
+    n_rows = len(df)
+    if blocks is None:
+        positions = np.arange(n_rows)
+        blocks = ((df.iloc[start:start + BLOCK_ROWS], positions[start:start + BLOCK_ROWS])
+                  for start in range(0, n_rows, BLOCK_ROWS))
+    blocks = [_features(frame, positions) for frame, positions in blocks]
+
+    # Map block-local codes onto one vocabulary
+    global_codes, names = pd.factorize(np.concatenate([b[3] for b in blocks]) if blocks else np.empty(0, dtype=object))
+    bounds = np.cumsum([len(b[3]) for b in blocks])[:-1]
+    mapping = np.split(global_codes.astype(np.int32), bounds)
+    rows = np.concatenate([b[0] for b in blocks]) if blocks else np.empty(0, dtype=np.int32)
+    codes = np.concatenate([m[b[1]] for m, b in zip(mapping, blocks)]) if blocks else np.empty(0, dtype=np.int32)
+    counts = np.concatenate([b[2] for b in blocks]) if blocks else np.empty(0, dtype=np.float32)
+
+    # Keep features that can relate titles, then renumber them densely
+    df_counts = np.bincount(codes, minlength=len(names))
+    is_genre = np.asarray(pd.Index(names, dtype=object).str.startswith('genre:'), dtype=bool)
+    useful = is_genre | ((df_counts >= MIN_DF) & (df_counts <= MAX_DF * n_rows))
+    renumber = np.cumsum(useful) - 1
+    keep = useful[codes]
+    rows, codes, counts = rows[keep], renumber[codes[keep]].astype(np.int32), counts[keep]
+    names, df_counts, is_genre = names[useful], df_counts[useful], is_genre[useful]
+
+    # Sublinear tf x smoothed idf; genres get GENRE_WEIGHT instead of a term frequency
+    idf = (np.log((1 + n_rows) / (1 + df_counts)) + 1).astype(np.float32)
+    values = np.where(is_genre[codes], np.float32(GENRE_WEIGHT), 1 + np.log(counts)) * idf[codes]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n_rows)).astype(np.float32)
+    values = (values / norms[rows]).astype(np.float32)
+
+    by_row = np.lexsort((codes, rows))
+    by_feature = np.lexsort((rows, codes))
+    return {
+        'names': np.asarray(names, dtype=object),
+        'indptr': csr.pointers(rows, n_rows),
+        'features': codes[by_row],
+        'values': values[by_row],
+        'col_ptr': csr.pointers(codes, len(names)),
+        'col_rows': rows[by_feature],
+        'col_values': values[by_feature],
+        'n_rows': n_rows,
+    }
+
+def _top_k(scores, k):
+    """
+    Positions of the k highest scores in each row of a 2-D block (or of a 1-D array), best first.
+    """
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+def like(model, rows, k=10, within=None):
+    """
+    For each title in `rows`, the k most similar other titles (cosine over the feature matrix),
+    as a list of (row positions, scores), best first.
+    Queries are scored in batches through the feature-major postings: one bincount per batch,
+    touching only the titles that share a feature with a query.
+    `within` (row positions) restricts the candidates, e.g. to the filtered titles.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    n = model['n_rows']
+    allowed = None
+    if within is not None:
+        allowed = np.zeros(n, dtype=bool)
+        allowed[np.asarray(within, dtype=np.int64)] = True
+
+    indptr, features, values = model['indptr'], model['features'], model['values']
+    col_ptr, col_rows, col_values = model['col_ptr'], model['col_rows'], model['col_values']
+    batch = max(1, MAX_BATCH_CELLS // max(n, 1))
+    results = []
+    for start in range(0, len(rows), batch):
+        queries = rows[start:start + batch]
+        # Features of every query in the batch, with the query they belong to
+        spans = csr.spans(indptr, queries)
+        query_ids = np.repeat(np.arange(len(queries)), indptr[queries + 1] - indptr[queries])
+        q_features, q_values = features[spans], values[spans]
+
+        # Postings of those features, weighted by the query's value of the feature
+        sizes = col_ptr[q_features + 1] - col_ptr[q_features]
+        postings = csr.spans(col_ptr, q_features)
+        cells = np.repeat(query_ids, sizes).astype(np.int64) * n + col_rows[postings]
+        weights = np.repeat(q_values, sizes) * col_values[postings]
+        scores = np.bincount(cells, weights=weights, minlength=len(queries) * n).reshape(len(queries), n)
+
+        scores[np.arange(len(queries)), queries] = 0 # a title is not similar to itself
+        if allowed is not None:
+            scores[:, ~allowed] = 0
+        top = _top_k(scores, k)
+        for i in range(len(queries)):
+            best = top[i][scores[i, top[i]] > 0]
+            results.append((best.astype(np.int32), scores[i, best].astype(np.float32)))
+    return results
+
+def nearest(model, rows, k=10, exclude=True):
+    """
+    The k titles closest to the centroid of a set of titles (e.g. the filtered selection),
+    as (row positions, scores), best first. With exclude=True members of the set are not returned.
+    The catalog is scored BLOCK_ROWS titles at a time, keeping only a running top k.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    n, indptr = model['n_rows'], model['indptr']
+    if not len(rows):
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    # Centroid over the features (dense, one value per feature)
+    spans = csr.spans(indptr, rows)
+    centroid = np.bincount(model['features'][spans], weights=model['values'][spans], minlength=len(model['names']))
+    centroid = (centroid / max(np.linalg.norm(centroid), 1e-12)).astype(np.float32)
+
+    members = np.zeros(n, dtype=bool)
+    if exclude:
+        members[rows] = True
+    best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n)
+        lo, hi = indptr[start], indptr[stop]
+        products = model['values'][lo:hi] * centroid[model['features'][lo:hi]]
+        # Per-title sums of the block: cumulative sum cut at the title boundaries (empty titles score 0)
+        cumulative = np.concatenate([[0], np.cumsum(products, dtype=np.float64)])
+        scores = (cumulative[indptr[start + 1:stop + 1] - lo] - cumulative[indptr[start:stop] - lo]).astype(np.float32)
+        scores[members[start:stop]] = 0
+
+        candidates = np.concatenate([best_rows, np.arange(start, stop)])
+        candidate_scores = np.concatenate([best_scores, scores])
+        top = _top_k(candidate_scores, k)[0]
+        best_rows, best_scores = candidates[top], candidate_scores[top]
+
+    keep = best_scores > 0
+    return best_rows[keep].astype(np.int32), best_scores[keep]
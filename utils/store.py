@@ -0,0 +1,475 @@
+"""
+Loading, cleaning and caching of the catalog and the structures derived from it, without Streamlit,
+so batch jobs can import it (see utils/batch.py). utils/io.py is the app's Streamlit front to it.
+Errors are raised; the app turns them into messages.
+"""
+import functools
+import hashlib
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import prep, cube, perf, csr, search, similar, talent
+
+# Free-text columns: skipped by the streaming loader and read on demand (see load_text)
+TEXT_COLUMNS = ['cast', 'description']
+# Explicit dtypes for the raw CSV columns, so chunks never need type inference
+RAW_DTYPES = {
+    'show_id': 'str', 'type': 'str', 'title': 'str', 'director': 'str', 'cast': 'str', 'country': 'str',
+    'date_added': 'str', 'release_year': 'Int16', 'rating': 'str', 'duration': 'str', 'listed_in': 'str',
+    'description': 'str',
+}
+
+# Metadata key under which a snapshot records the fingerprint of the CSV and the prep schema it was built from
+SNAPSHOT_KEY = b'netflix_hub.source_fingerprint'
+# Files built from a CSV and kept next to it (same stem), by kind
+DERIVED_FILES = {'snapshot': '.parquet', 'search': '.search.npz', 'similar': '.similar.npz'}
+
+# Prepared (loaded + cleaned) frames shared by every session, keyed on absolute path.
+# Each entry is (fingerprint, DataFrame); a changed fingerprint replaces the entry.
+_PREPARED = {}
+_PREPARED_LOCK = threading.RLock()
+# Serializes delta ingests (see ingest_delta)
+_INGEST_LOCK = threading.Lock()
+# Structures derived from the prepared frames (index, cube), keyed on (name, absolute path)
+_DERIVED = {}
+# One build lock per derived structure (same keys as _DERIVED): a build holds only its own, not _PREPARED_LOCK
+_BUILD_LOCKS = {}
+# How each derived structure absorbs an upsert: updater(value, old_rows, old_positions, new_rows, new_positions).
+# Structures without an updater (corpus-wide statistics such as the similarity model) are dropped and rebuilt.
+_UPDATERS = {'index': prep.update_index, 'cube': cube.update_cube, 'search': search.update_search}
+# Catalog version per path once deltas were ingested on top of the file (see ingest_delta)
+_VERSIONS = {}
+# Free text of titles ingested into a streamed catalog, which the file does not hold (or holds stale):
+# (fingerprint, TEXT_COLUMNS frame indexed by show_id) per path
+_INGESTED_TEXT = {}
+_DIGESTS = {}
+CACHE_STATS = {'hits': 0, 'misses': 0}
+
+def file_fingerprint(filepath):
+    """
+    Content fingerprint of a file (BLAKE2 digest of its bytes).
+    The digest is only recomputed when the file's size or mtime change.
+    """
+    path = os.path.abspath(filepath)
+    stat = os.stat(path)
+    cached = _DIGESTS.get(path)
+    if cached and cached[0] == (stat.st_size, stat.st_mtime_ns):
+        return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+    _DIGESTS[path] = ((stat.st_size, stat.st_mtime_ns), fingerprint)
+    return fingerprint
+
+def _missing(filepath):
+    return FileNotFoundError(f"File not found: {filepath}. Please upload 'Ntitles.csv' to the root directory.")
+
+# Raw frames of the last few files read, keyed on (path, fingerprint); callers must not modify them
+@functools.lru_cache(maxsize=4)
+def _read_csv(filepath, fingerprint):
+    return pd.read_csv(filepath)
+
+def load_data(filepath):
+    """
+    Load CSV data with caching. Raises FileNotFoundError when the file is missing.
+    """
+    if not os.path.exists(filepath):
+        raise _missing(filepath)
+    return _read_csv(filepath, file_fingerprint(filepath))
+
+def load_prepared(filepath, use_snapshot=True, chunksize=None, workers=None):
+    """
+    Load and clean the catalog, cached across sessions on the file's content fingerprint.
+    Replacing the file in place invalidates the cached frame.
+    A fresh Parquet snapshot (see build_snapshot) is read instead of the CSV when present.
+    With a chunksize the CSV is streamed instead (see _stream_prepared); the mode of the load that
+    filled the cache is the one every caller gets until the file changes.
+    workers > 1 cleans a full CSV load on a process pool (see prep.clean_data_parallel).
+    Raises FileNotFoundError when the file is missing.
+    """
+    if not os.path.exists(filepath):
+        raise _missing(filepath)
+
+    path = os.path.abspath(filepath)
+    fingerprint = file_fingerprint(path)
+    # Fast path without the lock, so sessions are not held up while another load or warm-up runs
+    entry = _PREPARED.get(path)
+    if entry and entry[0] == fingerprint:
+        CACHE_STATS['hits'] += 1
+        return entry[1]
+
+    # The lock makes concurrent first requests wait for one preparation instead of each running it
+    with _PREPARED_LOCK:
+        entry = _PREPARED.get(path)
+        if entry and entry[0] == fingerprint:
+            CACHE_STATS['hits'] += 1
+            return entry[1]
+
+        CACHE_STATS['misses'] += 1
+        if chunksize:
+            with perf.span('stream_csv'):
+                df, derived = _stream_prepared(path, chunksize)
+            for name, value in derived.items():
+                _DERIVED[(name, path)] = (fingerprint, value)
+        else:
+            with perf.span('read_snapshot'):
+                df = load_snapshot(path, fingerprint) if use_snapshot else None
+            if df is None:
+                with perf.span('read_csv'):
+                    raw = pd.read_csv(path)
+                with perf.span('clean', rows=len(raw)):
+                    df = prep.clean_data_parallel(raw, workers) if workers else prep.clean_data(raw)
+        _PREPARED[path] = (fingerprint, df)
+        return df
+
+def _stream_prepared(path, chunksize):
+    """
+    Read the CSV in chunks with explicit dtypes, cleaning each chunk and folding it into the
+    index, cube and search index as it goes. `cast` and `description` only feed those and are
+    dropped with each chunk, so the raw free text of the full catalog is never held in memory.
+    Returns the prepared frame (without TEXT_COLUMNS) and the derived structures.
+    """
+    frames, indexes, cubes, searches = [], [], [], []
+    offset = 0
+    for chunk in pd.read_csv(path, usecols=lambda c: c in RAW_DTYPES, dtype=RAW_DTYPES, chunksize=chunksize):
+        prepared = prep.clean_data(chunk)
+        positions = np.arange(offset, offset + len(prepared))
+        indexes.append(prep.build_index(prepared, positions=positions))
+        cubes.append(cube.build_cube(prepared))
+        searches.append(search.build_search(prepared, positions=positions))
+        frames.append(prepared.drop(columns=[c for c in TEXT_COLUMNS if c in prepared.columns]))
+        offset += len(prepared)
+
+    if not frames:
+        return pd.DataFrame(), {}
+    derived = {
+        'index': prep.merge_indexes(indexes),
+        'cube': cube.merge_cubes(cubes),
+        'search': search.merge_searches(searches),
+    }
+    return prep.concat_prepared(frames), derived
+
+def _ingested_text(path):
+    entry = _INGESTED_TEXT.get(path)
+    if entry and entry[0] == file_fingerprint(path):
+        return entry[1]
+    return pd.DataFrame(columns=TEXT_COLUMNS, index=pd.Index([], name='show_id'))
+
+def load_text(filepath, rows, columns=TEXT_COLUMNS, chunksize=100_000):
+    """
+    Add free-text columns missing from `rows` (a slice of a streamed catalog), read on demand.
+    Only the requested titles' values are kept; the scan stops once all of them are found.
+    Titles ingested with a delta take their text from the delta.
+    """
+    missing = [c for c in columns if c not in rows.columns]
+    if not missing or rows.empty:
+        return rows
+
+    ingested = _ingested_text(os.path.abspath(filepath))
+    wanted = set(rows['show_id']) - set(ingested.index)
+    found = []
+    if wanted:
+        for chunk in pd.read_csv(filepath, usecols=['show_id'] + missing, dtype=RAW_DTYPES, chunksize=chunksize):
+            chunk = chunk[chunk['show_id'].isin(wanted)]
+            found.append(chunk)
+            wanted.difference_update(chunk['show_id'])
+            if not wanted:
+                break
+
+    found = [pd.concat(found).drop_duplicates('show_id', keep='last')] if found else []
+    found.append(ingested.loc[ingested.index.isin(rows['show_id']), missing].reset_index())
+    text = pd.concat(found).set_index('show_id')
+    if 'cast' in text.columns:
+        text['cast'] = text['cast'].fillna('Unknown')
+    return rows.join(text, on='show_id')
+
+def _build_lock(key):
+    with _PREPARED_LOCK:
+        return _BUILD_LOCKS.setdefault(key, threading.Lock())
+
+def _load_derived(filepath, name, builder):
+    """
+    builder(prepared frame), built once per content fingerprint alongside the cached frame.
+    Returns None when the catalog could not be loaded.
+    Each structure is built under its own lock, so sessions reading the frame or other structures
+    never wait on the build; the result is only published if the frame it was built from is still current.
+    """
+    path = os.path.abspath(filepath)
+    if load_prepared(path).empty:
+        return None
+
+    fingerprint = file_fingerprint(path)
+    entry = _DERIVED.get((name, path))
+    if entry and entry[0] == fingerprint:
+        return entry[1]
+
+    with _build_lock((name, path)):
+        while True:
+            df = load_prepared(path)
+            if df.empty:
+                return None
+            fingerprint = file_fingerprint(path)
+            entry = _DERIVED.get((name, path))
+            if entry and entry[0] == fingerprint:
+                return entry[1]
+
+            with perf.span(f"build_{name}"):
+                value = builder(df)
+            with _PREPARED_LOCK:
+                current = _PREPARED.get(path)
+                if current is not None and current[1] is df:
+                    _DERIVED[(name, path)] = (current[0], value)
+                    return value
+            # A delta was ingested (or the file replaced) during the build: build again from the new frame
+
+def load_index(filepath):
+    """
+    Inverted country/genre/cast/director index of the prepared catalog (see prep.build_index).
+    """
+    return _load_derived(filepath, 'index', prep.build_index) or {}
+
+def load_cube(filepath):
+    """
+    Aggregate count cube of the prepared catalog (see cube.build_cube).
+    """
+    return _load_derived(filepath, 'cube', cube.build_cube)
+
+def load_talent(filepath):
+    """
+    Cast/director collaboration graph of the prepared catalog (see talent.build_talent),
+    built from the inverted index so names are not split again.
+    """
+    path = os.path.abspath(filepath)
+    return _load_derived(path, 'talent', lambda df: talent.build_talent(load_index(path), len(df)))
+
+def _load_persisted(path, name, build):
+    """
+    A derived structure kept in its file next to the CSV (see csr.save): read back when it was written
+    for the same catalog version and schema, else built from the prepared frame and written there.
+    """
+    def load_or_build(df):
+        tag = f"{catalog_version(path)}:{prep.SCHEMA_VERSION}"
+        structure = csr.load(derived_path(path, name), tag)
+        if structure is None:
+            structure = build(df)
+            try:
+                csr.save(structure, derived_path(path, name), tag)
+            except OSError:
+                pass # read-only location: keep the in-memory structure
+        return structure
+
+    return _load_derived(path, name, load_or_build)
+
+def load_search(filepath):
+    """
+    Full-text search index of the prepared catalog (see search.build_search), persisted next to the CSV.
+    """
+    return _load_persisted(os.path.abspath(filepath), 'search', search.build_search)
+
+def load_similar(filepath):
+    """
+    "Similar titles" model of the prepared catalog (see similar.build_model), persisted next to the CSV.
+    A streamed catalog holds no descriptions, so they are read back from the CSV for the build.
+    """
+    path = os.path.abspath(filepath)
+
+    def build(df):
+        blocks = None if 'description' in df.columns else _description_blocks(path, df)
+        return similar.build_model(df, blocks)
+
+    return _load_persisted(path, 'similar', build)
+
+def _description_blocks(path, df, chunksize=similar.BLOCK_ROWS):
+    """
+    (frame, row positions) blocks of a streamed catalog with its descriptions, for similar.build_model.
+    Descriptions are read from the CSV chunk by chunk and matched to rows by show_id, so the column is
+    never held whole and rows ingested or reordered since the load still get their own text.
+    """
+    ids = pd.Index(df['show_id'])
+    ingested = _ingested_text(path)
+    for chunk in pd.read_csv(path, usecols=['show_id', 'description'], dtype=RAW_DTYPES, chunksize=chunksize):
+        chunk = chunk[~chunk['show_id'].isin(ingested.index)].drop_duplicates('show_id', keep='last')
+        positions = ids.get_indexer(chunk['show_id'])
+        found = positions >= 0
+        positions = positions[found]
+        yield df[['listed_in']].iloc[positions].assign(description=chunk['description'].to_numpy()[found]), positions
+
+    positions = ids.get_indexer(ingested.index)
+    found = positions >= 0
+    if found.any():
+        positions = positions[found]
+        yield df[['listed_in']].iloc[positions].assign(description=ingested['description'].to_numpy()[found]), positions
+
+def catalog_version(filepath):
+    """
+    Identifier of the catalog content currently served for a file: its fingerprint,
+    extended with the digest of every delta ingested on top of it.
+    """
+    path = os.path.abspath(filepath)
+    fingerprint = file_fingerprint(path)
+    # Entries are replaced whole, so the read needs no lock (a build may hold it for a while)
+    version = _VERSIONS.get(path)
+    if version and version[0] == fingerprint:
+        return version[1]
+    return fingerprint
+
+def ingest_delta(filepath, delta):
+    """
+    Upsert a catalog delta (CSV path or raw DataFrame) into the cached prepared frame by show_id.
+    Only the delta rows are cleaned, and the cached index and cube are updated from the changed rows.
+    Changes live in memory on top of the current file: replacing the file drops them,
+    so deltas should also be merged into the source file upstream.
+    Returns the number of (updated, inserted) rows.
+    """
+    path = os.path.abspath(filepath)
+    raw = pd.read_csv(delta) if isinstance(delta, str) else delta
+    raw = raw.drop_duplicates('show_id', keep='last')
+    if load_prepared(path).empty or raw.empty:
+        return 0, 0
+
+    cleaned = prep.clean_data(raw)
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(raw, index=False).to_numpy().tobytes(), digest_size=16)
+
+    # Ingests run one at a time. The merge and the updates are computed outside _PREPARED_LOCK, so sessions
+    # loading the catalog are not held up; only the publishing step takes it.
+    with _INGEST_LOCK:
+        with _PREPARED_LOCK:
+            fingerprint, base = _PREPARED[path]
+            derived = {name: value for (name, entry_path), (entry_fp, value) in _DERIVED.items()
+                       if entry_path == path and entry_fp == fingerprint}
+            previous = _VERSIONS.get(path)
+            previous = previous[1] if previous and previous[0] == fingerprint else fingerprint
+            kept = _ingested_text(path)
+        frame = base
+
+        missing = base.columns.difference(cleaned.columns)
+        if len(missing):
+            raise ValueError(f"Delta is missing columns: {', '.join(missing)}")
+        # The delta keeps every cleaned column: a streamed frame has no free text, but the index and
+        # search updaters still need the new rows' cast and description
+        base, cleaned = prep.align_categories(base, cleaned)
+
+        found = pd.Index(base['show_id']).get_indexer(cleaned['show_id'])
+        changed = found >= 0
+        old_positions = found[changed]
+        old_rows = base.iloc[old_positions]
+
+        # Changed titles keep their row position; new titles are appended
+        merged = pd.concat([base, cleaned.loc[~changed, base.columns]], ignore_index=True)
+        for j, col in enumerate(merged.columns):
+            merged.iloc[old_positions, j] = cleaned[col].array[changed]
+        new_positions = np.concatenate([old_positions, np.arange(len(base), len(merged))])
+        new_rows = pd.concat([cleaned[changed], cleaned[~changed]])
+
+        # Everything is computed before anything is published, so an updater that raises leaves the
+        # previous frame, derived structures and version in place together
+        updated = {name: _UPDATERS[name](value, old_rows, old_positions, new_rows, new_positions)
+                   for name, value in derived.items() if name in _UPDATERS}
+        digest.update(previous.encode())
+        # A streamed frame has no free text: keep the delta's, since the file does not have it
+        text = None
+        if any(c not in base.columns for c in TEXT_COLUMNS):
+            text = cleaned.set_index('show_id')[TEXT_COLUMNS]
+            text = pd.concat([kept[~kept.index.isin(text.index)], text])
+
+        with _PREPARED_LOCK:
+            if _PREPARED.get(path, (None, None))[1] is not frame:
+                raise RuntimeError(f"{filepath} was reloaded while the delta was applied; ingest it again")
+            _PREPARED[path] = (fingerprint, merged)
+            for (name, entry_path), (entry_fp, value) in list(_DERIVED.items()):
+                if entry_path != path:
+                    continue
+                if name in updated and derived.get(name) is value:
+                    _DERIVED[(name, path)] = (fingerprint, updated[name])
+                else:
+                    # No updater, or built from the previous frame while the delta was applied: rebuilt on demand
+                    del _DERIVED[(name, path)]
+            if text is not None:
+                _INGESTED_TEXT[path] = (fingerprint, text)
+            _VERSIONS[path] = (fingerprint, digest.hexdigest())
+        return int(changed.sum()), int((~changed).sum())
+
+def cache_info():
+    """
+    Hit/miss counters and cached entries of the prepared-frame cache.
+    """
+    with _PREPARED_LOCK:
+        return {
+            'hits': CACHE_STATS['hits'],
+            'misses': CACHE_STATS['misses'],
+            'entries': {path: fp for path, (fp, _) in _PREPARED.items()},
+        }
+
+def clear_cache():
+    """
+    Drop every cached prepared frame and raw CSV and reset the counters.
+    """
+    _read_csv.cache_clear()
+    with _PREPARED_LOCK:
+        _PREPARED.clear()
+        _DERIVED.clear()
+        _VERSIONS.clear()
+        _INGESTED_TEXT.clear()
+        CACHE_STATS['hits'] = 0
+        CACHE_STATS['misses'] = 0
+
+def derived_path(filepath, kind):
+    """
+    Location of a file derived from a CSV (next to it, same stem, suffix from DERIVED_FILES).
+    """
+    return os.path.splitext(filepath)[0] + DERIVED_FILES[kind]
+
+def _snapshot_tag(fingerprint):
+    return f"{fingerprint}:{prep.SCHEMA_VERSION}"
+
+def build_snapshot(filepath, out_path=None):
+    """
+    Clean the CSV and write the prepared frame to a Parquet snapshot.
+    Dtypes (categoricals, datetime64, nullable ints) round-trip through the pandas metadata.
+    """
+    out_path = out_path or derived_path(filepath, 'snapshot')
+    df = prep.clean_data(pd.read_csv(filepath))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_KEY] = _snapshot_tag(file_fingerprint(filepath)).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temporary file first so readers never see a half-written snapshot
+    tmp_path = out_path + '.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def load_snapshot(filepath, fingerprint=None):
+    """
+    Memory-map the prepared frame from the CSV's snapshot.
+    Returns None when the snapshot is missing, older than the CSV or built from other content/schema.
+    """
+    path = derived_path(filepath, 'snapshot')
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(filepath):
+        return None
+
+    try:
+        table = pq.read_table(path, memory_map=True)
+    except Exception:
+        return None
+
+    stored = (table.schema.metadata or {}).get(SNAPSHOT_KEY, b'').decode()
+    if stored != _snapshot_tag(fingerprint or file_fingerprint(filepath)):
+        return None
+    return table.to_pandas()
+
+if __name__ == "__main__":
+    # Build step: python -m utils.store [Ntitles.csv]
+    source = sys.argv[1] if len(sys.argv) > 1 else 'Ntitles.csv'
+    print(f"Snapshot written to {build_snapshot(source)}")
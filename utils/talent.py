@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+from utils import csr
+
+# Role bits of a (title, person) incidence
+CAST, DIRECTOR = 1, 2
+ROLES = {'cast': CAST, 'director': DIRECTOR}
+# Largest number of (person, person) pairs expanded at once while counting collaborations
+PAIR_BLOCK = 20_000_000
+# Strongest pairs of the whole catalog kept precomputed (the unfiltered view)
+TOP_PAIRS = 50
+# PageRank damping factor, iteration cap and convergence tolerance (L1 change of the scores)
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+def build_talent(index, n_rows):
+    """
+    Title x person incidence of the cast and director fields of an inverted index (prep.build_index),
+    so names are split once, when the index is built. People are interned to integer ids (positions in
+    'names', sorted). Holds the incidence by person ('person_ptr', 'person_rows') and by title
+    ('title_ptr', 'title_persons', 'title_roles'), the collaboration graph ('edge_ptr', 'edge_dst',
+    'edge_weight': titles shared by two people), per-person metrics in 'metrics' and the TOP_PAIRS
+    strongest pairs in 'pairs'.
+    """
+    fields = {role: index.get(role, {}) for role in ROLES}
+    names = np.array(sorted(set(fields['cast']) | set(fields['director'])), dtype=object)
+    ids = pd.Index(names)
+
+    persons, rows, roles = [], [], []
+    for role, postings in fields.items():
+        if not postings:
+            continue
+        counts = np.fromiter((len(p) for p in postings.values()), dtype=np.int64, count=len(postings))
+        persons.append(np.repeat(ids.get_indexer(list(postings)), counts).astype(np.int32))
+        rows.append(np.concatenate(list(postings.values())).astype(np.int32))
+        roles.append(np.full(counts.sum(), ROLES[role], dtype=np.uint8))
+    persons = np.concatenate(persons) if persons else np.empty(0, dtype=np.int32)
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    roles = np.concatenate(roles) if roles else np.empty(0, dtype=np.uint8)
+
+    # One incidence per (title, person): a director who also acts in the title keeps both role bits
+    key = rows.astype(np.int64) * max(len(names), 1) + persons
+    keys, inverse = np.unique(key, return_inverse=True)
+    combined = np.zeros(len(keys), dtype=np.uint8)
+    np.bitwise_or.at(combined, inverse.ravel(), roles)
+    roles = combined
+    rows, persons = (keys // max(len(names), 1)).astype(np.int32), (keys % max(len(names), 1)).astype(np.int32)
+
+    by_person = np.lexsort((rows, persons))
+    talent = {
+        'names': names,
+        'n_rows': int(n_rows),
+        'title_ptr': csr.pointers(rows, n_rows),
+        'title_persons': persons,
+        'title_roles': roles.astype(np.uint8),
+        'person_ptr': csr.pointers(persons, len(names)),
+        'person_rows': rows[by_person],
+    }
+    src, dst, weight = collaborations(talent)
+    talent['edge_ptr'] = csr.pointers(src, len(names))
+    talent['edge_dst'] = dst
+    talent['edge_weight'] = weight
+    talent['metrics'] = _metrics(talent, src)
+    talent['pairs'] = _top_pairs(talent['names'], src, dst, weight, TOP_PAIRS)
+    return talent
+
+def collaborations(talent, positions=None):
+    """
+    Collaboration edges among the titles at `positions` (all titles when None) as (src, dst, shared titles),
+    both directions, sorted by (src, dst). Pairs are expanded per title with array arithmetic,
+    PAIR_BLOCK at a time, and counted with np.unique.
+    """
+    ptr, persons = talent['title_ptr'], talent['title_persons']
+    n_people = max(len(talent['names']), 1)
+    titles = np.arange(talent['n_rows']) if positions is None else np.asarray(positions, dtype=np.int64)
+    sizes = ptr[titles + 1] - ptr[titles]
+    titles, sizes = titles[sizes > 1], sizes[sizes > 1]
+
+    # Cut the titles into blocks of at most PAIR_BLOCK expanded pairs (a bigger title gets a block of its own)
+    cost = np.cumsum(sizes.astype(np.int64) ** 2)
+    cuts = np.searchsorted(cost, np.arange(PAIR_BLOCK, cost[-1] if len(cost) else 0, PAIR_BLOCK))
+    keys, counts = [], []
+    for block in np.split(titles, np.unique(cuts)):
+        if not len(block):
+            continue
+        spans = csr.spans(ptr, block)
+        size = np.repeat(ptr[block + 1] - ptr[block], ptr[block + 1] - ptr[block])
+        first = np.repeat(ptr[block], ptr[block + 1] - ptr[block])
+        # Every entry of a title paired with every entry of the same title
+        src = np.repeat(spans, size)
+        offset = np.arange(len(src)) - np.repeat(np.cumsum(size) - size, size)
+        dst = np.repeat(first, size) + offset
+        keep = src != dst
+        pair = persons[src[keep]].astype(np.int64) * n_people + persons[dst[keep]]
+        block_keys, block_counts = np.unique(pair, return_counts=True)
+        keys.append(block_keys)
+        counts.append(block_counts)
+
+    if not keys:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    weight = np.bincount(inverse.ravel(), weights=np.concatenate(counts)).astype(np.int32)
+    return (keys // n_people).astype(np.int32), (keys % n_people).astype(np.int32), weight
+
+def pagerank(n_people, src, dst, weight):
+    """
+    Weighted PageRank of the collaboration graph by power iteration; each step is one bincount over the edges.
+    """
+    if not n_people:
+        return np.empty(0)
+    out = np.bincount(src, weights=weight, minlength=n_people)
+    share = weight / out[src]
+    rank = np.full(n_people, 1.0 / n_people)
+    for _ in range(MAX_ITERATIONS):
+        dangling = rank[out == 0].sum()
+        updated = (1 - DAMPING) / n_people + DAMPING * (np.bincount(dst, weights=share * rank[src], minlength=n_people)
+                                                      + dangling / n_people)
+        converged = np.abs(updated - rank).sum() < TOLERANCE
+        rank = updated
+        if converged:
+            break
+    return rank
+
+def _metrics(talent, src):
+    """
+    Per-person metrics: titles, titles directed/acted in, distinct collaborators, collaborations
+    (shared-title count summed over collaborators), degree centrality and PageRank.
+    """
+    n_people = len(talent['names'])
+    persons, roles = talent['title_persons'], talent['title_roles']
+    collaborators = np.diff(talent['edge_ptr'])
+    return pd.DataFrame({
+        'name': talent['names'],
+        'titles': np.diff(talent['person_ptr']),
+        'directed': np.bincount(persons[(roles & DIRECTOR) > 0], minlength=n_people),
+        'acted': np.bincount(persons[(roles & CAST) > 0], minlength=n_people),
+        'collaborators': collaborators,
+        'collaborations': np.bincount(src, weights=talent['edge_weight'], minlength=n_people).astype(np.int64),
+        'degree_centrality': collaborators / max(n_people - 1, 1),
+        'pagerank': pagerank(n_people, src, talent['edge_dst'], talent['edge_weight']),
+    })
+
+def top_people(talent, positions=None, role=None, k=10):
+    """
+    The k people credited on the most titles among `positions` (all titles when None),
+    optionally in one role ('cast' or 'director'), as a frame of name and count.
+    """
+    spans = slice(None) if positions is None else csr.spans(talent['title_ptr'], np.asarray(positions, dtype=np.int64))
+    persons, roles = talent['title_persons'][spans], talent['title_roles'][spans]
+    if role is not None:
+        persons = persons[(roles & ROLES[role]) > 0]
+    counts = np.bincount(persons, minlength=len(talent['names']))
+    top = np.argsort(-counts, kind='stable')[:k]
+    top = top[counts[top] > 0]
+    return pd.DataFrame({'name': talent['names'][top], 'count': counts[top]})
+
+def _top_pairs(names, src, dst, weight, k):
+    once = src < dst
+    src, dst, weight = src[once], dst[once], weight[once]
+    top = np.argpartition(-weight, k - 1)[:k] if len(weight) > k else np.arange(len(weight))
+    top = top[np.lexsort((dst[top], src[top], -weight[top]))]
+    return pd.DataFrame({
+        'pair': [f"{a} & {b}" for a, b in zip(names[src[top]], names[dst[top]])],
+        'first': names[src[top]],
+        'second': names[dst[top]],
+        'count': weight[top],
+    })
+
+def top_pairs(talent, positions=None, k=10):
+    """
+    The k pairs of people sharing the most titles among `positions` (all titles when None),
+    as a frame of pair label, both names and shared titles.
+    """
+    if positions is None and k <= len(talent['pairs']):
+        return talent['pairs'].head(k)
+    if positions is None:
+        src = np.repeat(np.arange(len(talent['names']), dtype=np.int32), np.diff(talent['edge_ptr']))
+        dst, weight = talent['edge_dst'], talent['edge_weight']
+    else:
+        src, dst, weight = collaborations(talent, positions)
+    return _top_pairs(talent['names'], src, dst, weight, k)
+
+def collaborators(talent, name, k=10):
+    """
+    The k people who shared the most titles with `name`, as a frame of name and shared titles.
+    """
+    person = np.searchsorted(talent['names'], name)
+    if person >= len(talent['names']) or talent['names'][person] != name:
+        return pd.DataFrame({'name': [], 'count': []})
+    lo, hi = talent['edge_ptr'][person], talent['edge_ptr'][person + 1]
+    order = np.argsort(-talent['edge_weight'][lo:hi], kind='stable')[:k]
+    return pd.DataFrame({'name': talent['names'][talent['edge_dst'][lo:hi][order]],
+                         'count': talent['edge_weight'][lo:hi][order]})
+
+def central_people(talent, positions=None, k=100):
+    """
+    Metrics of the k people with the highest PageRank among those credited on `positions` (all when None).
+    """
+    metrics = talent['metrics']
+    if positions is not None:
+        spans = csr.spans(talent['title_ptr'], np.asarray(positions, dtype=np.int64))
+        present = np.zeros(len(metrics), dtype=bool)
+        present[talent['title_persons'][spans]] = True
+        metrics = metrics[present]
+    return metrics.nlargest(k, 'pagerank')
@@ -1,13 +1,21 @@
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import pandas as pd
 import streamlit as st
 
+from utils import aggregates, downsample
+
 # --- Design System ---
 COLOR_SCALE = px.colors.qualitative.Bold
 SEQ_COLOR = px.colors.sequential.Viridis
 TEMPLATE = "plotly_white"
 
+def _box_kwargs(stats, group):
+    """go.Box arguments drawing one precomputed box (see downsample.box_stats)."""
+    row = stats.loc[group]
+    return {k: [row[k]] for k in ['q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean']}
+
 # --- 1. KPI & Overview Charts ---
 
 def plot_kpi_cards(total, movies, tv):
@@ -16,37 +24,38 @@ def plot_kpi_cards(total, movies, tv):
     col2.metric("Movies", f"{movies:,}")
     col3.metric("TV Shows", f"{tv:,}")
 
-def plot_type_donut(df):
+# Charts 1-6 and 11-14 are pure counts and read the aggregate cube (see utils/cube.py)
+# instead of scanning rows; the others still take the filtered frame.
+# The numbers come from utils/aggregates.py; the builders here only draw them.
+
+def plot_type_donut(agg):
     """Chart 1: Donut Chart of Type Distribution"""
-    counts = df['type'].value_counts().reset_index()
-    counts.columns = ['type', 'count']
+    counts = aggregates.type_counts(agg)
     fig = px.pie(counts, values='count', names='type', hole=0.6,
                  title='Content Distribution',
                  color_discrete_sequence=COLOR_SCALE, template=TEMPLATE)
     return fig
 
-def plot_added_area(df):
+def plot_added_area(agg):
     """Chart 2: Area Chart of Added Content Over Time"""
-    data = df.groupby(['added_year', 'type']).size().reset_index(name='count')
+    data = aggregates.added_by_year(agg)
     fig = px.area(data, x='added_year', y='count', color='type',
                   title='Growth of Content Library',
                   color_discrete_sequence=COLOR_SCALE, template=TEMPLATE)
     fig.update_layout(xaxis_title="Year Added", yaxis_title="Titles Added")
     return fig
 
-def plot_release_line(df):
+def plot_release_line(agg):
     """Chart 3: Line Chart of Release Years"""
-    data = df.groupby(['release_year', 'type']).size().reset_index(name='count')
-    data = data[data['release_year'] > 1990] # Focus on modern era
+    data = aggregates.release_by_year(agg, since=1990)
     fig = px.line(data, x='release_year', y='count', color='type',
                   title='Original Release Year Trends (Post-1990)',
                   color_discrete_sequence=COLOR_SCALE, template=TEMPLATE)
     return fig
 
-def plot_heatmap(df):
+def plot_heatmap(agg):
     """Chart 4: Heatmap of Month vs Year"""
-    df_clean = df.dropna(subset=['added_year', 'added_month_num'])
-    data = df_clean.groupby(['added_year', 'added_month_num']).size().reset_index(name='count')
+    data = aggregates.added_by_month(agg)
     pivot = data.pivot(index='added_month_num', columns='added_year', values='count').fillna(0)
     
     fig = px.imshow(pivot, 
@@ -58,11 +67,9 @@ def plot_heatmap(df):
 
 # --- 2. Geography Charts ---
 
-def plot_world_map(df):
+def plot_world_map(agg):
     """Chart 5: Choropleth Map"""
-    data = df['primary_country'].value_counts().reset_index()
-    data.columns = ['country', 'count']
-    data = data[data['country'] != 'Unknown']
+    data = aggregates.country_counts(agg)
 
     fig = px.choropleth(data, locations="country", locationmode='country names',
                         color="count", hover_name="country",
@@ -72,11 +79,9 @@ def plot_world_map(df):
     fig.update_layout(margin={"r":0,"t":40,"l":0,"b":0})
     return fig
 
-def plot_top_countries_bar(df):
+def plot_top_countries_bar(agg):
     """Chart 6: Horizontal Bar of Top Countries"""
-    data = df['primary_country'].value_counts().head(10).reset_index()
-    data.columns = ['country', 'count']
-    data = data[data['country'] != 'Unknown']
+    data = aggregates.top_countries(agg, 10)
     
     fig = px.bar(data, x='count', y='country', orientation='h',
                  title='Top 10 Producing Countries',
@@ -87,76 +92,84 @@ def plot_top_countries_bar(df):
 # --- 3. Duration Charts ---
 
 def plot_movie_duration_hist(df):
-    """Chart 7: Histogram of Movie Durations"""
-    data = df[df['type'] == 'Movie'].dropna(subset=['duration_min'])
-    fig = px.histogram(data, x='duration_min', nbins=50,
-                       title='Distribution of Movie Lengths',
-                       marginal='box',
-                       color_discrete_sequence=[COLOR_SCALE[1]], template=TEMPLATE)
-    fig.update_layout(xaxis_title="Minutes")
+    """Chart 7: Histogram of Movie Durations (binned server-side, box from precomputed quartiles)"""
+    bins = aggregates.duration_histogram(df, nbins=50)
+    stats = aggregates.duration_box(df)
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+    if not stats.empty:
+        fig.add_trace(go.Box(**_box_kwargs(stats, 'all'), y=['duration_min'], orientation='h',
+                             marker_color=COLOR_SCALE[1], showlegend=False, hoverinfo='x'), row=1, col=1)
+    fig.add_trace(go.Bar(x=bins['center'], y=bins['count'], width=bins['right'] - bins['left'],
+                         customdata=bins[['left', 'right']], marker_color=COLOR_SCALE[1], showlegend=False,
+                         hovertemplate='%{customdata[0]:.0f}-%{customdata[1]:.0f} min: %{y}<extra></extra>'),
+                  row=2, col=1)
+    fig.update_layout(title='Distribution of Movie Lengths', template=TEMPLATE, bargap=0)
+    fig.update_yaxes(visible=False, row=1, col=1)
+    fig.update_xaxes(title_text="Minutes", row=2, col=1)
+    fig.update_yaxes(title_text="count", row=2, col=1)
     return fig
 
 def plot_tv_seasons_bar(df):
     """Chart 8: Bar Chart of TV Seasons"""
-    data = df[df['type'] == 'TV Show'].dropna(subset=['seasons'])
-    counts = data['seasons'].value_counts().reset_index()
-    counts.columns = ['seasons', 'count']
+    counts = aggregates.season_counts(df)
     
     fig = px.bar(counts, x='seasons', y='count',
                  title='Longevity of TV Shows (Seasons)',
                  color_discrete_sequence=[COLOR_SCALE[2]], template=TEMPLATE)
     return fig
 
-def plot_duration_scatter(df):
-    """Chart 9: Scatter of Year vs Duration"""
-    data = df[df['type'] == 'Movie'].dropna(subset=['duration_min', 'release_year'])
-    if len(data) > 1000: data = data.sample(1000) # Sample for performance
-    
-    fig = px.scatter(data, x='release_year', y='duration_min',
+def plot_duration_scatter(df, strategy='density', n=1000):
+    """Chart 9: Scatter of Year vs Duration
+    strategy='density' plots one marker per (year, duration bin) colored by title count;
+    strategy='sample' plots a seeded sample of n movies."""
+    if strategy == 'sample':
+        data = downsample.sample(df[df['type'] == 'Movie'].dropna(subset=['duration_min', 'release_year']), n)
+        fig = px.scatter(data, x='release_year', y='duration_min',
+                         title='Movie Duration vs Release Year',
+                         opacity=0.6,
+                         color_discrete_sequence=[COLOR_SCALE[3]], template=TEMPLATE)
+        return fig
+
+    cells = aggregates.duration_density(df)
+    fig = px.scatter(cells, x='release_year', y='duration_min', color='count',
                      title='Movie Duration vs Release Year',
                      opacity=0.6,
-                     color_discrete_sequence=[COLOR_SCALE[3]], template=TEMPLATE)
+                     color_continuous_scale=SEQ_COLOR, template=TEMPLATE)
     return fig
 
 def plot_genre_duration_box(df):
-    """Chart 10: Box Plot of Duration by Genre"""
-    data = df[df['type'] == 'Movie'].dropna(subset=['duration_min', 'listed_in'])
-    data['primary_genre'] = data['listed_in'].apply(lambda x: x.split(',')[0])
-    
-    top_genres = data['primary_genre'].value_counts().head(8).index
-    data = data[data['primary_genre'].isin(top_genres)]
+    """Chart 10: Box Plot of Duration by Genre (precomputed quartiles)"""
+    stats = aggregates.genre_duration_box(df, k=8)
     
-    fig = px.box(data, x='primary_genre', y='duration_min',
-                 title='Duration Variance by Top Genres',
-                 color='primary_genre', template=TEMPLATE)
+    fig = go.Figure([go.Box(**_box_kwargs(stats, genre), x=[genre], name=str(genre)) for genre in stats.index])
+    fig.update_layout(title='Duration Variance by Top Genres', template=TEMPLATE,
+                      xaxis_title='primary_genre', yaxis_title='duration_min', legend_title_text='primary_genre')
     return fig
 
 # --- 4. Content & Ratings Charts ---
 
-def plot_genre_treemap(df):
+def plot_genre_treemap(agg):
     """Chart 11: Treemap of Genres"""
-    genres = df['listed_in'].str.split(', ').explode().value_counts().head(20).reset_index()
-    genres.columns = ['genre', 'count']
+    genres = aggregates.top_genres(agg, 20)
     
     fig = px.treemap(genres, path=['genre'], values='count',
                      title='Top 20 Genres Hierarchy',
                      color='count', color_continuous_scale=SEQ_COLOR, template=TEMPLATE)
     return fig
 
-def plot_genre_bar(df):
+def plot_genre_bar(agg):
     """Chart 12: Bar Chart of Genres"""
-    genres = df['listed_in'].str.split(', ').explode().value_counts().head(10).reset_index()
-    genres.columns = ['genre', 'count']
+    genres = aggregates.top_genres(agg, 10)
     
     fig = px.bar(genres, x='genre', y='count',
                  title='Top 10 Most Common Genres',
                  color_discrete_sequence=COLOR_SCALE, template=TEMPLATE)
     return fig
 
-def plot_rating_bar(df):
+def plot_rating_bar(agg):
     """Chart 13: Ratings Distribution"""
-    counts = df['rating'].value_counts().reset_index()
-    counts.columns = ['rating', 'count']
+    counts = aggregates.rating_counts(agg)
     
     fig = px.bar(counts, x='rating', y='count',
                  title='Content Rating Distribution',
@@ -164,9 +177,9 @@ def plot_rating_bar(df):
     fig.update_layout(xaxis={'categoryorder':'total descending'})
     return fig
 
-def plot_rating_stack(df):
+def plot_rating_stack(agg):
     """Chart 14: Ratings by Type Stacked"""
-    counts = df.groupby(['rating', 'type']).size().reset_index(name='count')
+    counts = aggregates.rating_by_type(agg)
     fig = px.bar(counts, x='rating', y='count', color='type',
                  title='Ratings Composition by Type',
                  barmode='stack',
@@ -174,26 +187,55 @@ def plot_rating_stack(df):
     fig.update_layout(xaxis={'categoryorder':'total descending'})
     return fig
 
-def plot_directors_bar(df):
-    """Chart 15: Top Directors"""
-    data = df[df['director'] != 'Unknown']
-    counts = data['director'].value_counts().head(10).reset_index()
-    counts.columns = ['director', 'count']
-    
-    fig = px.bar(counts, x='count', y='director', orientation='h',
+def plot_directors_bar(people):
+    """Chart 15: Top Directors (name/count frame, co-directors credited separately; see talent.top_people)"""
+    fig = px.bar(people, x='count', y='name', orientation='h',
                  title='Top 10 Prolific Directors',
                  color_discrete_sequence=[COLOR_SCALE[5]], template=TEMPLATE)
-    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, yaxis_title='director')
     return fig
 
 def plot_added_day_bar(df):
     """Chart 16: Content Added by Day of Month"""
-    data = df.dropna(subset=['added_day'])
-    counts = data['added_day'].value_counts().sort_index().reset_index()
-    counts.columns = ['day', 'count']
+    counts = aggregates.added_day_counts(df)
     
     fig = px.bar(counts, x='day', y='count',
                  title='Content Releases by Day of Month',
                  color_discrete_sequence=[COLOR_SCALE[0]], template=TEMPLATE)
     fig.update_layout(xaxis=dict(tickmode='linear', dtick=1))
-    return fig
\ No newline at end of file
+    return fig
+
+def plot_similar_bar(results, title='Most Similar Titles'):
+    """Chart 17: Similarity scores of recommended titles (frame with title, type, similarity)"""
+    fig = px.bar(results, x='similarity', y='title', color='type', orientation='h',
+                 title=title,
+                 color_discrete_sequence=COLOR_SCALE, template=TEMPLATE)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, xaxis_title='Cosine similarity')
+    return fig
+
+# Charts 18-20 read the talent graph (see utils/talent.py)
+
+def plot_cast_bar(people):
+    """Chart 18: Most Featured Cast Members"""
+    fig = px.bar(people, x='count', y='name', orientation='h',
+                 title='Top 10 Most Featured Cast Members',
+                 color_discrete_sequence=[COLOR_SCALE[2]], template=TEMPLATE)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, yaxis_title='cast member')
+    return fig
+
+def plot_collaboration_bar(pairs):
+    """Chart 19: Strongest Collaborations (pairs of people sharing the most titles)"""
+    fig = px.bar(pairs, x='count', y='pair', orientation='h',
+                 title='Most Frequent Collaborations',
+                 color_discrete_sequence=[COLOR_SCALE[3]], template=TEMPLATE)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, yaxis_title=None, xaxis_title='shared titles')
+    return fig
+
+def plot_centrality_scatter(metrics):
+    """Chart 20: Network Centrality (titles vs. distinct collaborators, sized by PageRank)"""
+    data = metrics.assign(role=(metrics['directed'] > 0).map({True: 'Director', False: 'Cast'}))
+    fig = px.scatter(data, x='titles', y='collaborators', size='pagerank', color='role',
+                     hover_name='name', hover_data={'collaborations': True, 'pagerank': ':.2e'},
+                     title='Most Central People in the Collaboration Network',
+                     color_discrete_sequence=COLOR_SCALE, template=TEMPLATE)
+    return fig
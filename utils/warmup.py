@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+
+from utils import store, export, figcache, prep, cube, talent
+
+logger = logging.getLogger(__name__)
+
+# Charts of the overview and deep-dive pages primed per preset, by the data they are built from
+# (the cube slice or the filtered rows); talent charts are primed from the talent graph
+AGG_CHARTS = ('plot_type_donut', 'plot_added_area', 'plot_release_line', 'plot_heatmap', 'plot_world_map',
+              'plot_top_countries_bar', 'plot_genre_treemap', 'plot_genre_bar', 'plot_rating_bar', 'plot_rating_stack')
+FRAME_CHARTS = ('plot_movie_duration_hist', 'plot_tv_seasons_bar', 'plot_duration_scatter',
+                'plot_genre_duration_box', 'plot_added_day_bar')
+
+# Warm-up progress of this process: idle -> running -> ready | failed
+_STATUS = {'state': 'idle', 'started': None, 'seconds': None, 'error': None, 'steps': []}
+_LOCK = threading.Lock()
+
+def start(data_path, presets=('default',), export_dir=None, ready_file=None, **load_options):
+    """
+    Warm the process in a background thread: load and clean the catalog, build the index, cube,
+    talent graph, search index and similarity model, and prime the figure cache for the given presets
+    (from export_dir when it has them, else rendered).
+    Runs once per process; later calls return False. Sessions keep being served meanwhile.
+    load_options are passed to store.load_prepared (chunksize, workers...).
+    When ready, ready_file is created so a readiness probe (`test -f <ready_file>`) can gate traffic.
+    """
+    with _LOCK:
+        if _STATUS['state'] != 'idle':
+            return False
+        _STATUS.update(state='running', started=time.time())
+    if ready_file and os.path.exists(ready_file):
+        os.remove(ready_file)
+
+    thread = threading.Thread(target=_run, args=(data_path, presets, export_dir, ready_file, load_options),
+                              name='warmup', daemon=True)
+    thread.start()
+    return True
+
+def _step(name, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    with _LOCK:
+        _STATUS['steps'].append({'name': name, 'seconds': time.perf_counter() - start})
+    return result
+
+def _run(data_path, presets, export_dir, ready_file, load_options):
+    try:
+        df = _step('load', store.load_prepared, data_path, **load_options)
+        if df.empty:
+            raise RuntimeError(f"could not load {data_path}")
+        _step('index', store.load_index, data_path)
+        _step('cube', store.load_cube, data_path)
+        _step('talent', store.load_talent, data_path)
+        _step('search', store.load_search, data_path)
+        _step('similar', store.load_similar, data_path)
+        for preset in presets:
+            _step(f"figures:{preset}", _prime, data_path, preset, export_dir)
+    except Exception as e:
+        logger.exception("warm-up failed")
+        with _LOCK:
+            _STATUS.update(state='failed', error=str(e), seconds=time.time() - _STATUS['started'])
+        return
+
+    with _LOCK:
+        _STATUS.update(state='ready', seconds=time.time() - _STATUS['started'])
+    if ready_file:
+        with open(ready_file, 'w') as f:
+            f.write(f"{_STATUS['seconds']:.2f}\n")
+    logger.info("warm-up ready in %.2fs", _STATUS['seconds'])
+
+def _prime(data_path, preset, export_dir):
+    df = store.load_prepared(data_path)
+    types, years = export.resolve(preset, df)
+    state = figcache.filter_state(store.catalog_version(data_path), types, years)
+    if export_dir and export.serve(export_dir, state):
+        return
+
+    # The builders are called directly rather than through the sections: this thread has no script run
+    # to draw widgets in. viz is imported here, it pulls in Plotly (see sections/registry.py)
+    from utils import viz
+    from sections import deep_dives
+
+    agg = cube.slice_cube(store.load_cube(data_path), types, years)
+    filtered = prep.filter_data(df, types, years, None, index=store.load_index(data_path), columns=deep_dives.COLUMNS)
+    for name in AGG_CHARTS:
+        figcache.figure(getattr(viz, name), agg, state)
+    for name in FRAME_CHARTS:
+        figcache.figure(getattr(viz, name), filtered, state)
+
+    graph = store.load_talent(data_path)
+    positions = filtered.index.to_numpy() if len(filtered) < graph['n_rows'] else None
+    figcache.figure(viz.plot_directors_bar, lambda: talent.top_people(graph, positions, 'director'), state)
+    figcache.figure(viz.plot_cast_bar, lambda: talent.top_people(graph, positions, 'cast'), state)
+    figcache.figure(viz.plot_collaboration_bar, lambda: talent.top_pairs(graph, positions), state)
+    figcache.figure(viz.plot_centrality_scatter, lambda: talent.central_people(graph, positions), state)
+
+def status():
+    """
+    Snapshot of the warm-up progress: state, start time, duration, error and per-step timings.
+    """
+    with _LOCK:
+        return dict(_STATUS, steps=list(_STATUS['steps']))
+
+def is_ready():
+    return status()['state'] == 'ready'